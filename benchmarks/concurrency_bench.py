@@ -0,0 +1,116 @@
+"""
+Compares run_concurrently on a thread pool and on a gevent pool for an I/O-bound fan-out.
+Every task waits for a simulated network call and then serializes a small payload, like the IAM and
+authorization fan-outs do. gevent mode needs monkey-patching before platform_common is imported, so each
+mode runs in its own process.
+Usage:
+    python benchmarks/concurrency_bench.py
+    python benchmarks/concurrency_bench.py --mode gevent --tasks 1000 --latency-ms 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+MODES = ("thread", "gevent")
+DEFAULT_TASK_COUNTS = (16, 64, 256, 1024)
+DEFAULT_MAX_CONCURRENCIES = (16, 64, 256)
+DEFAULT_LATENCY_MS = 20
+DEFAULT_REPEATS = 3
+def run_mode(
+    mode: str, task_counts, max_concurrencies, latency_ms: float, repeats: int
+) -> list:
+    """Runs the workload in this process and returns one result per task count and concurrency."""
+    if mode == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    import resource
+    import time
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from platform_common.utils import gevent_mode
+    from platform_common.utils.concurrency import run_concurrently
+    if mode == "gevent":
+        gevent_mode.enable_gevent_mode()
+    payload = {
+        "path": "/iam/v2/authorization",
+        "method": "GET",
+        "actions": list(range(20)),
+    }
+    def task():
+        time.sleep(latency_ms / 1000)
+        return len(json.dumps(payload))
+    results = []
+    for task_count in task_counts:
+        for max_concurrency in max_concurrencies:
+            timings = []
+            for _ in range(repeats):
+                started_at = time.perf_counter()
+                run_concurrently([task] * task_count, max_concurrency)
+                timings.append(time.perf_counter() - started_at)
+            best_sec = min(timings)
+            # The fan-out cannot finish faster than this with max_concurrency tasks in flight
+            ideal_sec = -(-task_count // max_concurrency) * latency_ms / 1000
+            results.append(
+                {
+                    "mode": mode,
+                    "tasks": task_count,
+                    "maxConcurrency": max_concurrency,
+                    "bestMs": round(best_sec * 1000, 1),
+                    "overheadMs": round((best_sec - ideal_sec) * 1000, 1),
+                }
+            )
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for result in results:
+        result["maxRssMb"] = round(max_rss_mb, 1)
+    return results
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mode", choices=MODES, help="Run a single mode in this process."
+    )
+    parser.add_argument("--tasks", type=int, nargs="+", default=DEFAULT_TASK_COUNTS)
+    parser.add_argument(
+        "--max-concurrency", type=int, nargs="+", default=DEFAULT_MAX_CONCURRENCIES
+    )
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args()
+    if args.mode:
+        results = run_mode(
+            args.mode, args.tasks, args.max_concurrency, args.latency_ms, args.repeats
+        )
+        print(json.dumps(results))
+        return
+    results = []
+    for mode in MODES:
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--mode",
+            mode,
+            "--tasks",
+            *map(str, args.tasks),
+            "--max-concurrency",
+            *map(str, args.max_concurrency),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--repeats",
+            str(args.repeats),
+        ]
+        output = subprocess.run(
+            command, check=True, capture_output=True, text=True
+        ).stdout
+        results.extend(json.loads(output.splitlines()[-1]))
+    print(
+        f"Simulated I/O latency per task: {args.latency_ms} ms, best of {args.repeats} runs"
+    )
+    print(
+        f"{'mode':<8}{'tasks':>7}{'concurrency':>13}{'best ms':>10}{'overhead ms':>13}{'max RSS MB':>12}"
+    )
+    for result in results:
+        print(
+            f"{result['mode']:<8}{result['tasks']:>7}{result['maxConcurrency']:>13}"
+            f"{result['bestMs']:>10}{result['overheadMs']:>13}{result['maxRssMb']:>12}"
+        )
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compares the Kafka payload serializers: JSON with the standard library, JSON with orjson and msgpack.
+Reports the encode and decode time and the payload size of a job status message and of a batch of rows.
+The serializers are taken from the serializers registry. The standard library JSON serializer is the
+registry's fallback when orjson is not installed.
+Usage:
+    python benchmarks/serializers_bench.py
+    python benchmarks/serializers_bench.py --rows 1000 --repeats 5
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from platform_common.stream import serializers
+DEFAULT_ROW_COUNT = 500
+DEFAULT_REPEATS = 5
+def get_status_payload() -> dict:
+    return {
+        "jobId": "6650f3a2c1d4e5f6a7b8c9d0",
+        "orgId": "org-1",
+        "projectId": "project-1",
+        "status": "IN_PROGRESS",
+        "progress": 42.5,
+        "processedRows": 125000,
+        "totalRows": 300000,
+        "message": "Reading tdsls400 from the landing bucket",
+        "updatedAt": datetime.datetime(2026, 10, 19, 8, 0, 0),
+        "tables": [
+            {
+                "tableName": f"tdsls40{index}",
+                "status": "COMPLETED",
+                "rowCount": 1000 * index,
+            }
+            for index in range(5)
+        ],
+    }
+def get_rows_payload(row_count: int) -> list:
+    return [
+        {
+            "t$orno": f"SO{index:08d}",
+            "t$pono": index % 50,
+            "t$item": f"ITEM-{index % 997:05d}",
+            "t$qoor": index * 1.5,
+            "t$pric": round(index * 0.37, 2),
+            "t$cdat": datetime.datetime(2026, 1, 1) + datetime.timedelta(minutes=index),
+            "t$stat": "OPEN" if index % 3 else "CLOSED",
+            "t$desc": "Standard sales order line",
+        }
+        for index in range(row_count)
+    ]
+def get_serializers() -> dict:
+    """Returns the (encoder, decoder) pairs to compare, keyed by name."""
+    results = {}
+    orjson = serializers.orjson
+    def with_stdlib_json(function):
+        # The registry falls back to the standard library when orjson is not importable
+        def run(value):
+            serializers.orjson = None
+            try:
+                return function(value)
+            finally:
+                serializers.orjson = orjson
+        return run
+    encoder, decoder = serializers.get_serializer(serializers.JSON_CONTENT_TYPE)
+    results["json"] = (with_stdlib_json(encoder), with_stdlib_json(decoder))
+    if orjson is not None:
+        results["orjson"] = (encoder, decoder)
+    if serializers.MSGPACK_CONTENT_TYPE in serializers.serializers:
+        results["msgpack"] = serializers.get_serializer(
+            serializers.MSGPACK_CONTENT_TYPE
+        )
+    return results
+def measure(function, value, repeats: int) -> float:
+    """Returns the best time of one call in microseconds."""
+    timer = timeit.Timer(lambda: function(value))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeats, number=number)) / number * 1e6
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROW_COUNT)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args()
+    payloads = {
+        "status": get_status_payload(),
+        f"{args.rows} rows": get_rows_payload(args.rows),
+    }
+    print(
+        f"{'payload':<12}{'serializer':<12}{'encode us':>12}{'decode us':>12}{'bytes':>10}"
+    )
+    for payload_name, payload in payloads.items():
+        for name, (encoder, decoder) in get_serializers().items():
+            data = encoder(payload)
+            encode_us = measure(encoder, payload, args.repeats)
+            decode_us = measure(decoder, data, args.repeats)
+            print(
+                f"{payload_name:<12}{name:<12}{encode_us:>12.1f}{decode_us:>12.1f}{len(data):>10}"
+            )
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@ from .config_loader import (
     get_environment_config,
     get_service_token,
     get_config,
+    get_config_or_default,
+    get_numeric_config,
+    get_boolean_config,
+    get_json_config,
     set_config,
 )
 from platform_common.environment_name_provider import EnvironmentNameProvider
@@ -10,9 +14,11 @@ from .utils import logger
 import os
 from .enums import Environments
 from .exceptions.custom_exceptions import DatameshConfigurationExceptions
-from .utils import secrets_manager
+from .utils import secrets_manager, gevent_mode
 logger.setup_logger()
 os.environ["PYTHONUNBUFFERED"] = "1"
+if os.environ.get("ALBANERO_GEVENT_MODE", "").lower() in ("1", "true", "yes"):
+    gevent_mode.enable_gevent_mode()
 def get_datamesh_configurations():
     """
     This method retrieves the "env_name" from the EC2 instance and
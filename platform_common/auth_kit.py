@@ -1,6 +1,7 @@
 import re
 import requests
 import json
+import hashlib
 from flask import request, jsonify, Request, url_for
 from .exceptions.exception_handler import DataMeshExceptionHandler
 from .exceptions.custom_exceptions import (
@@ -9,12 +10,21 @@ from .exceptions.custom_exceptions import (
     TokenGenerationExceptions,
 )
 from .utils import logger
-from .config_loader import get_config, set_config
+from .config_loader import (
+    get_config,
+    set_config,
+    get_config_or_default,
+    get_numeric_config,
+)
 from .dataclasses import UserDetails
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 import os
 from .storage.mongo import MongoDBConnector
+from .utils.cache import TTLCache
+from .utils.concurrency import map_concurrently
 content_type = "application/json"
+DEFAULT_AUTHORIZATION_CACHE_TTL_SEC = 60
+authorization_decision_cache = TTLCache(ttl_sec=DEFAULT_AUTHORIZATION_CACHE_TTL_SEC)
 class IAM:
     @classmethod
     def register_service(cls, app):
@@ -178,6 +188,74 @@ class IAM:
                 500,
             )
     @staticmethod
+    def authorize_many(
+        user_details: UserDetails,
+        actions: List[Tuple[str, str]],
+        service_token: str = None,
+    ) -> Dict[Tuple[str, str], bool]:
+        """
+        Checks whether the user may perform each of the given actions, e.g. to build a permission map for the UI.
+        Decisions are served from the decision cache when available. The remaining actions are sent to IAM
+        in one batched request when IAM_BATCH_AUTHORIZATION_PATH is configured, otherwise they are checked
+        concurrently one request per action. All decisions received from IAM are merged into the cache.
+        Args:
+            user_details (UserDetails): User-related information, including token, orgId and projectId.
+            actions (list): (path, method) pairs to be authorized.
+            service_token (str, optional): Service token to be sent to IAM, defaults to the current service token.
+        Returns:
+            dict: True or False for every (path, method) pair. Actions that IAM did not decide, e.g. because
+                the token was rejected or IAM was unreachable, are False and are not cached.
+        """
+        service_token = service_token or get_config("SERVICE_TOKEN")
+        token_hash = hashlib.sha256((user_details.token or "").encode("utf-8")).hexdigest()
+        decisions = {}
+        pending_actions = []
+        for path, method in dict.fromkeys(actions):
+            cache_key = (
+                token_hash,
+                user_details.org_id,
+                user_details.project_id,
+                method.upper(),
+                path,
+            )
+            decision = authorization_decision_cache.get(cache_key)
+            if decision is None:
+                pending_actions.append((path, method))
+            else:
+                decisions[(path, method)] = decision
+        if not pending_actions:
+            return decisions
+        fetched_decisions = None
+        if get_config_or_default("IAM_BATCH_AUTHORIZATION_PATH"):
+            fetched_decisions = request_batch_authorization(
+                user_details, pending_actions, service_token
+            )
+        if fetched_decisions is None:
+            fetched_decisions = map_concurrently(
+                lambda action: request_authorization(
+                    user_details, action[0], action[1], service_token
+                ),
+                pending_actions,
+            )
+        ttl_sec = get_numeric_config(
+            "ALBANERO_AUTHORIZATION_CACHE_TTL_SEC", DEFAULT_AUTHORIZATION_CACHE_TTL_SEC
+        )
+        for (path, method), decision in zip(pending_actions, fetched_decisions):
+            if decision is not None:
+                authorization_decision_cache.set(
+                    (
+                        token_hash,
+                        user_details.org_id,
+                        user_details.project_id,
+                        method.upper(),
+                        path,
+                    ),
+                    decision,
+                    ttl_sec,
+                )
+            decisions[(path, method)] = bool(decision)
+        return decisions
+    @staticmethod
     def get_user_details(
         user_details: UserDetails, service_token: str = None
     ) -> Dict[str, any]:
@@ -288,6 +366,105 @@ def generate_and_save_proxy_token(token: str, id: str, collection):
             upsert=True,
         )
     return proxy_access_token
+def build_authorization_payload(
+    user_details: UserDetails, path: str, method: str, service_token: str
+) -> dict:
+    return {
+        "applicationName": os.environ.get("PLATFORM_SERVICE_NAME", None),
+        "requestPath": path,
+        "method": method,
+        "nameSpace": get_config("PLATFORM_NAME_SPACE"),
+        "request": {
+            "contextPath": get_config("ALBANERO_BASE_ROUTE_URI"),
+            "headers": {},
+            "method": method,
+            "pathInfo": path,
+            "pathTranslated": f"/{path}",
+        },
+        "authToken": user_details.token,
+        "serviceToken": service_token,
+        "orgId": user_details.org_id,
+        "projectId": user_details.project_id,
+    }
+def build_authorization_headers(user_details: UserDetails, service_token: str) -> dict:
+    return {
+        "Authorization": user_details.token,
+        "X-Service-Token": service_token,
+        "Content-Type": content_type,
+        "x-Org-Id": user_details.org_id,
+        "x-Project-Id": user_details.project_id,
+    }
+def request_authorization(
+    user_details: UserDetails, path: str, method: str, service_token: str
+) -> Optional[bool]:
+    """
+    Sends a single authorization request to IAM.
+    Only a 403 is a denial. A 401 means the user or service token was rejected, which is not a decision
+    about the action, so like network errors it returns None and is never cached.
+    Returns:
+        bool or None: True if allowed, False if denied, None if IAM did not give a decision.
+    """
+    url = f"{get_config('ALBANERO_BASE_ROUTE_URI')}/iam/v2/authorization"
+    data = build_authorization_payload(user_details, path, method, service_token)
+    try:
+        response = requests.post(
+            url,
+            data=json.dumps(data),
+            headers=build_authorization_headers(user_details, service_token),
+        )
+    except requests.exceptions.RequestException as e:
+        message = DataMeshExceptionHandler.parse_message(e)
+        logger.error(f"Authorization check failed for {method} {path}: {message}")
+        return None
+    if response.status_code == 200:
+        return True
+    if response.status_code == 403:
+        return False
+    logger.error(
+        f"Authorization check failed for {method} {path}: {response.status_code} {response.text}"
+    )
+    return None
+def request_batch_authorization(
+    user_details: UserDetails, actions: List[Tuple[str, str]], service_token: str
+) -> Optional[List[Optional[bool]]]:
+    """
+    Sends all the actions to the IAM batch authorization endpoint in one request.
+    The endpoint is expected to answer with a "decisions" list in request order, where every item
+    carries an "authorized" flag.
+    Returns:
+        list or None: Decisions in the order of the actions, or None if the batch request failed.
+    """
+    url = f"{get_config('ALBANERO_BASE_ROUTE_URI')}{get_config('IAM_BATCH_AUTHORIZATION_PATH')}"
+    data = {
+        "applicationName": os.environ.get("PLATFORM_SERVICE_NAME", None),
+        "nameSpace": get_config("PLATFORM_NAME_SPACE"),
+        "authToken": user_details.token,
+        "serviceToken": service_token,
+        "orgId": user_details.org_id,
+        "projectId": user_details.project_id,
+        "requests": [
+            {"requestPath": path, "method": method} for path, method in actions
+        ],
+    }
+    try:
+        response = requests.post(
+            url,
+            data=json.dumps(data),
+            headers=build_authorization_headers(user_details, service_token),
+        )
+        if response.status_code == 200:
+            decisions = response.json()["decisions"]
+            if len(decisions) == len(actions):
+                return [decision.get("authorized") for decision in decisions]
+        logger.warning(
+            f"Batch authorization failed, falling back to single requests: {response.status_code}"
+        )
+    except Exception as e:
+        message = DataMeshExceptionHandler.parse_message(e)
+        logger.warning(
+            f"Batch authorization failed, falling back to single requests: {message}"
+        )
+    return None
 def convert_headers(req):
     headers_dict = {}
     for header, value in req.headers.items():
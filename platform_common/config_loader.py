@@ -36,7 +36,7 @@ def get_environment_config(config_file_path: str, dev_mode: bool):
             # Reading the configs from AWS secrets manager
             config_vars = secrets_manager.get_secret_by_name(config_file_path)
         logger.debug(
-            f"Successfully fetched the configs from {config_file_path}: {config_vars}"
+            lambda: f"Successfully fetched the configs from {config_file_path}: {config_vars}"
         )
         logger.info(f"Successfully fetched the configs from {config_file_path}")
         default_log_level = os.environ.get("DEFAULT_LOG_LEVEL", None)
@@ -61,6 +61,65 @@ def get_config(key_name) -> str:
         message = DataMeshExceptionHandler.parse_message(e)
         logger.error(message)
         raise e
+def get_config_or_default(key_name, default=None):
+    """Returns the config value for the given key, or the default when the key is not configured."""
+    if not config_vars:
+        return default
+    return config_vars.get(key_name, default)
+def get_numeric_config(key_name, default, value_type: type = float):
+    """
+    Returns the config value for the given key as a number, or the default when the key is not configured.
+    Values such as "600" from a key/value secret are converted to value_type. Values that cannot be
+    converted are logged and the default is returned.
+    """
+    value = get_config_or_default(key_name, default)
+    try:
+        return value_type(value)
+    except (TypeError, ValueError):
+        logger.warning(
+            f"Invalid value {value!r} for the {key_name} config, using the default {default}."
+        )
+        return default
+TRUE_CONFIG_VALUES = ("true", "1", "yes")
+FALSE_CONFIG_VALUES = ("false", "0", "no", "")
+def get_boolean_config(key_name, default: bool = False) -> bool:
+    """
+    Returns the config value for the given key as a boolean, or the default when the key is not configured.
+    Strings such as "true", "1" or "yes" and "false", "0" or "no" from a key/value secret are parsed
+    case-insensitively. Values that cannot be parsed are logged and the default is returned.
+    """
+    value = get_config_or_default(key_name, default)
+    if isinstance(value, (bool, int)):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in TRUE_CONFIG_VALUES:
+            return True
+        if value.strip().lower() in FALSE_CONFIG_VALUES:
+            return False
+    logger.warning(
+        f"Invalid value {value!r} for the {key_name} config, using the default {default}."
+    )
+    return default
+def get_json_config(key_name, default=None, value_type: type = dict):
+    """
+    Returns the config value for the given key as a JSON object, or the default when the key is not configured.
+    Values that arrive as JSON strings from a key/value secret are parsed. Values that cannot be parsed,
+    or that are not of value_type, are logged and the default is returned.
+    """
+    value = get_config_or_default(key_name, default)
+    if value is default:
+        return default
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if not isinstance(value, value_type):
+        logger.warning(
+            f"Invalid value {value!r} for the {key_name} config, using the default {default}."
+        )
+        return default
+    return value
 def set_config(key_name, value) -> None:
     try:
         if key_name in config_vars:
@@ -0,0 +1,153 @@
+import threading
+from time import monotonic
+from typing import FrozenSet, List, Optional
+from ..config_loader import get_config, get_boolean_config, get_numeric_config
+from ..enums import SourceSystems
+from ..storage.mongo import MongoDBConnector
+from ..utils import logger
+from ..utils.cache import TTLCache
+DEFAULT_CATALOG_INDEX_REFRESH_SEC = 600
+DEFAULT_CATALOG_COLUMNS_CACHE_SIZE = 10000
+class CatalogIndex:
+    """
+    A process-wide index of the tables of a LN or BAAN table metadata collection.
+    The names of all the tables are loaded with one query and refreshed every ALBANERO_CATALOG_INDEX_REFRESH_SEC
+    seconds, so existence checks need no query. The columns of a table are loaded on first use and cached
+    until the next refresh, and tables that are not in the index are never queried.
+    When ALBANERO_CATALOG_INDEX_CHANGE_STREAM is enabled, a Mongo change stream also applies inserts and
+    updates as they happen and triggers a refresh on deletes, replaces and renames. Deployments without change streams fall back
+    to the periodic refresh.
+    Usage:
+        if ln_catalog_index.contains("tdsls400"):
+            columns = ln_catalog_index.get_columns("tdsls400")
+    Args:
+        collection_config_key (str): Config key of the table metadata collection name.
+    """
+    def __init__(self, collection_config_key: str):
+        self.collection_config_key = collection_config_key
+        self.table_names: Optional[FrozenSet[str]] = None
+        self.loaded_at = None
+        self.columns_cache = None
+        self.lock = threading.Lock()
+        self.watch_thread = None
+    def get_collection(self):
+        mongo_client = MongoDBConnector.get_instance()
+        db = mongo_client[get_config("DB_NAME_LN_METADATA")]
+        return db[get_config(self.collection_config_key)]
+    def get_refresh_sec(self) -> float:
+        return get_numeric_config(
+            "ALBANERO_CATALOG_INDEX_REFRESH_SEC", DEFAULT_CATALOG_INDEX_REFRESH_SEC
+        )
+    def get_table_names(self) -> FrozenSet[str]:
+        """Returns the names of all the tables, loading them when the index is empty or stale."""
+        if (
+            self.table_names is None
+            or monotonic() - self.loaded_at >= self.get_refresh_sec()
+        ):
+            self.refresh()
+        return self.table_names
+    def refresh(self, force: bool = False) -> None:
+        """
+        Reloads the table names and clears the cached columns.
+        If the reload fails, the previously loaded names are kept until the next refresh.
+        Args:
+            force (bool, optional): Reload even if another thread has just refreshed the index.
+        """
+        with self.lock:
+            if (
+                not force
+                and self.table_names is not None
+                and monotonic() - self.loaded_at < self.get_refresh_sec()
+            ):
+                return
+            try:
+                collection = self.get_collection()
+                table_names = frozenset(
+                    document["tableName"]
+                    for document in collection.find({}, {"_id": 0, "tableName": 1})
+                    if document.get("tableName")
+                )
+            except Exception as e:
+                if self.table_names is None:
+                    raise
+                logger.warning(
+                    f"Failed to refresh the table names of {self.collection_config_key}, keeping the loaded ones: {e}"
+                )
+                self.loaded_at = monotonic()
+                return
+            self.table_names = table_names
+            self.loaded_at = monotonic()
+            self.columns_cache = TTLCache(
+                ttl_sec=self.get_refresh_sec(),
+                max_size=DEFAULT_CATALOG_COLUMNS_CACHE_SIZE,
+            )
+            logger.debug(
+                lambda: f"Loaded {len(table_names)} table names of {collection.name}."
+            )
+            if self.watch_thread is None and get_boolean_config(
+                "ALBANERO_CATALOG_INDEX_CHANGE_STREAM", False
+            ):
+                self.start_watching()
+    def contains(self, table_name: str) -> bool:
+        return table_name in self.get_table_names()
+    def get_columns(self, table_name: str) -> Optional[List[dict]]:
+        """
+        Returns the column specs of a table.
+        Args:
+            table_name (str): Name of the table, as stored in the metadata collection.
+        Returns:
+            list or None: The columns of the table, None if the table does not exist or has no columns.
+        """
+        if table_name not in self.get_table_names():
+            return None
+        columns_cache = self.columns_cache
+        columns = columns_cache.get(table_name)
+        if columns is None:
+            result = self.get_collection().find_one(
+                {"tableName": table_name}, {"_id": 0, "columns": 1}
+            )
+            columns = (result or {}).get("columns") or []
+            columns_cache.set(table_name, columns)
+        return columns or None
+    def start_watching(self) -> None:
+        self.watch_thread = threading.Thread(
+            target=self.watch, name=f"catalog-index-{self.collection_config_key}", daemon=True
+        )
+        self.watch_thread.start()
+    def watch(self) -> None:
+        """Applies the changes of the metadata collection to the index until the change stream fails."""
+        try:
+            with self.get_collection().watch(full_document="updateLookup") as stream:
+                for change in stream:
+                    self.apply_change(change)
+        except Exception as e:
+            logger.warning(
+                f"Stopped watching {self.collection_config_key} for changes, the catalog index is refreshed periodically: {e}"
+            )
+    def apply_change(self, change: dict) -> None:
+        operation_type = change.get("operationType")
+        document = change.get("fullDocument") or {}
+        table_name = document.get("tableName")
+        updated_fields = (change.get("updateDescription") or {}).get("updatedFields") or {}
+        with self.lock:
+            if self.table_names is None:
+                return
+            if operation_type == "insert" and table_name:
+                self.table_names = self.table_names | {table_name}
+                self.columns_cache.pop(table_name)
+            elif (
+                operation_type == "update"
+                and table_name in self.table_names
+                and "tableName" not in updated_fields
+            ):
+                self.columns_cache.pop(table_name)
+            else:
+                # Deletes only carry the _id of the document, and renames and replaces do not carry the
+                # previous name, so the names are reloaded on next use
+                self.loaded_at = float("-inf")
+ln_catalog_index = CatalogIndex("COL_NAME_LN_TABLE_METADATA")
+baan_catalog_index = CatalogIndex("COL_NAME_BAAN_TABLE_METADATA")
+def get_catalog_index(target_system: str) -> CatalogIndex:
+    if target_system == SourceSystems.LN:
+        return ln_catalog_index
+    return baan_catalog_index
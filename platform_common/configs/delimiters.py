@@ -1,9 +1,53 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from ..storage.mongo import MongoDBConnector
+from ..utils.cache import TTLCache
 from ..utils.helpers import current_time_ms
-from ..config_loader import get_config
+from ..config_loader import get_config, get_numeric_config
 from ..dataclasses import S3Table, UserDetails, CSVDelimiters, DA2Delimiters, DATDelimiters
 from ..utils import logger
-from ..enums import DataFormats
+from ..enums import DataFormats, SourceSystems
+from ..exceptions.exception_handler import DataMeshExceptionHandler
+DEFAULT_DELIMITERS_CACHE_TTL_SEC = 300
+DELIMITED_FILE_EXTENSIONS = (".csv", ".da2", ".dat")
+DEFAULT_DELIMITERS_BULK_CHUNK_SIZE = 1000
+DEFAULT_DELIMITERS_CACHE_MAX_OBJECTS = 5000
+DELIMITERS_CACHE_MAX_BUCKETS = 100
+OBJECT_DELIMITERS_FIELDS = (
+    "fieldDelimiter",
+    "quoteCharacter",
+    "quoteEscapeCharacter",
+    "programName",
+    "recordDelimiter",
+    "encoding",
+    "targetSystem",
+)
+BUCKET_DELIMITERS_FIELDS = (
+    "fieldDelimiter",
+    "quoteCharacter",
+    "quoteEscapeCharacter",
+    "recordDelimiter",
+    "encoding",
+)
+class BucketDelimiters(NamedTuple):
+    """
+    The delimiters stored for one bucket, object-level delimiters are keyed by object name.
+    object_delimiters is None for buckets with more files than ALBANERO_DELIMITERS_CACHE_MAX_OBJECTS,
+    the delimiters of their files are then queried per file.
+    """
+    object_delimiters: Optional[Dict[str, dict]]
+    bucket_delimiters: Optional[dict]
+class DelimitersUpdateResult(NamedTuple):
+    """The outcome of setting the delimiters of one file."""
+    object_name: str
+    updated: bool
+    error: Optional[str] = None
+# Keyed by org, project, connector and bucket, holds at most
+# DELIMITERS_CACHE_MAX_BUCKETS * ALBANERO_DELIMITERS_CACHE_MAX_OBJECTS object-level delimiters
+delimiters_cache = TTLCache(
+    ttl_sec=DEFAULT_DELIMITERS_CACHE_TTL_SEC, max_size=DELIMITERS_CACHE_MAX_BUCKETS
+)
 class DelimitersConfig:
     @staticmethod
     def get_delimiters(source_details: S3Table, user_details: UserDetails):
@@ -21,15 +65,25 @@ class DelimitersConfig:
             f"Started fetching delimiters for {source_details.table_name}.",
             source_details.job_id,
         )
-        if not source_details.table_name.lower().endswith((".csv", ".da2", ".dat")):
+        if not source_details.table_name.lower().endswith(DELIMITED_FILE_EXTENSIONS):
             logger.debug(
                 f"The source file '{source_details.table_name}' is not a valid file format. Returning None.",
                 source_details.job_id,
             )
             return None
-        result = DelimitersConfig.__get_delimiters_from_db(source_details, user_details)
+        bucket = DelimitersConfig.__get_cached_bucket_delimiters(
+            source_details, user_details
+        )
+        if bucket is None or bucket.object_delimiters is None:
+            result = DelimitersConfig.__get_delimiters_from_db(
+                source_details, user_details
+            )
+        else:
+            result = bucket.object_delimiters.get(source_details.table_name)
+            result = dict(result) if result else None
         logger.debug(
-            f"Delimiters obtained from database: {result}", source_details.job_id
+            lambda: f"Delimiters obtained from database: {result}",
+            source_details.job_id,
         )
         if not result and source_details.table_name.lower().endswith(DataFormats.DA2.value):
             result = DA2Delimiters.get_default(source_details.table_name).to_dict()
@@ -40,20 +94,190 @@ class DelimitersConfig:
                 "No delimiters found in the database. Attempting to get bucket-level delimiters.",
                 source_details.job_id,
             )
-            result = DelimitersConfig.__get_bucket_level_delimiters(
-                source_details, user_details
-            )
+            if bucket is None:
+                result = DelimitersConfig.__get_bucket_level_delimiters(
+                    source_details, user_details
+                )
+            elif bucket.bucket_delimiters:
+                result = dict(bucket.bucket_delimiters)
             logger.debug(
-                f"Bucket-level delimiters obtained: {result}", source_details.job_id
+                lambda: f"Bucket-level delimiters obtained: {result}",
+                source_details.job_id,
             )
         if not result:
             logger.debug(
                 "No delimiters found. Using default delimiters.", source_details.job_id
             )
             result = CSVDelimiters.get_default().to_dict()
-        logger.debug(f"Final result: {result}", source_details.job_id)
+        logger.debug(lambda: f"Final result: {result}", source_details.job_id)
         return result
     @staticmethod
+    def get_delimiters_many(
+        source_details_list: List[S3Table], user_details: UserDetails
+    ) -> List[Optional[dict]]:
+        """
+        Resolves the delimiters of many files the same way get_delimiters does, with a constant number of queries.
+        The object-level delimiters of each bucket are fetched with one query and its bucket-level delimiters once,
+        and the program names of DA2/DAT files are looked up with one query.
+        Args:
+            source_details_list (list): Details of the source files, including connectorId, bucket, and filePath.
+            user_details (UserDetails): User details, including orgId and projectId.
+        Returns:
+            list: The delimiters of every file in the order of source_details_list, None for files that are not
+                CSV, DA2 or DAT files.
+        """
+        results: List[Optional[dict]] = [None] * len(source_details_list)
+        indexes_by_bucket: Dict[tuple, List[int]] = {}
+        for index, source_details in enumerate(source_details_list):
+            if source_details.table_name.lower().endswith(DELIMITED_FILE_EXTENSIONS):
+                cache_key = DelimitersConfig.__get_delimiters_cache_key(
+                    source_details, user_details
+                )
+                indexes_by_bucket.setdefault(cache_key, []).append(index)
+        default_indexes = []
+        for indexes in indexes_by_bucket.values():
+            first_source_details = source_details_list[indexes[0]]
+            bucket = DelimitersConfig.__get_cached_bucket_delimiters(
+                first_source_details, user_details
+            )
+            if bucket is None or bucket.object_delimiters is None:
+                bucket = DelimitersConfig.__load_bucket_delimiters(
+                    first_source_details,
+                    user_details,
+                    [source_details_list[index].table_name for index in indexes],
+                )
+            for index in indexes:
+                table_name = source_details_list[index].table_name
+                result = bucket.object_delimiters.get(table_name)
+                if result:
+                    results[index] = dict(result)
+                elif table_name.lower().endswith(
+                    (DataFormats.DA2.value, DataFormats.DAT.value)
+                ):
+                    default_indexes.append(index)
+                elif bucket.bucket_delimiters:
+                    results[index] = dict(bucket.bucket_delimiters)
+                else:
+                    results[index] = CSVDelimiters.get_default().to_dict()
+        program_names = DA2Delimiters.fetch_program_names(
+            [source_details_list[index].table_name for index in default_indexes],
+            SourceSystems.BAAN,
+        )
+        for index in default_indexes:
+            table_name = source_details_list[index].table_name
+            if table_name.lower().endswith(DataFormats.DA2.value):
+                delimiters = DA2Delimiters.get_default()
+            else:
+                delimiters = DATDelimiters.get_default()
+            delimiters.program_name = program_names[table_name]
+            results[index] = delimiters.to_dict()
+        logger.debug(
+            lambda: f"Resolved the delimiters of {len(source_details_list)} files in {len(indexes_by_bucket)} buckets."
+        )
+        return results
+    @staticmethod
+    def __get_delimiters_cache_key(source_details: S3Table, user_details: UserDetails):
+        return (
+            user_details.org_id,
+            user_details.project_id,
+            source_details.connector_id,
+            source_details.database_name,
+        )
+    @staticmethod
+    def __get_cached_bucket_delimiters(
+        source_details: S3Table, user_details: UserDetails
+    ) -> Optional[BucketDelimiters]:
+        """
+        Returns the delimiters of the bucket of the source file, loading them when they are not cached.
+        Args:
+            source_details (S3Table): Details of the source file, including connectorId and bucket.
+            user_details (UserDetails): User details, including orgId and projectId.
+        Returns:
+            BucketDelimiters or None: The delimiters of the bucket, None when the cache is disabled
+                by setting ALBANERO_DELIMITERS_CACHE_TTL_SEC to 0.
+        """
+        ttl_sec = get_numeric_config(
+            "ALBANERO_DELIMITERS_CACHE_TTL_SEC", DEFAULT_DELIMITERS_CACHE_TTL_SEC
+        )
+        if ttl_sec <= 0:
+            return None
+        cache_key = DelimitersConfig.__get_delimiters_cache_key(
+            source_details, user_details
+        )
+        bucket = delimiters_cache.get(cache_key)
+        if bucket is None:
+            bucket = DelimitersConfig.__load_bucket_delimiters(
+                source_details, user_details
+            )
+            delimiters_cache.set(cache_key, bucket, ttl_sec)
+        return bucket
+    @staticmethod
+    def __load_bucket_delimiters(
+        source_details: S3Table,
+        user_details: UserDetails,
+        object_names: Optional[List[str]] = None,
+    ) -> BucketDelimiters:
+        """
+        Loads the object-level delimiters of the files in the bucket and the bucket-level delimiters.
+        Args:
+            source_details (S3Table): Details of the source file, including connectorId and bucket.
+            user_details (UserDetails): User details, including orgId and projectId.
+            object_names (list, optional): Files whose object-level delimiters are loaded. Defaults to every file.
+        Returns:
+            BucketDelimiters: The delimiters of the bucket. Without object_names, the object-level delimiters
+                are None when the bucket has more than ALBANERO_DELIMITERS_CACHE_MAX_OBJECTS files.
+        """
+        logger.debug(
+            f"Started loading the delimiters of bucket {source_details.database_name}.",
+            source_details.job_id,
+        )
+        mongo_client = MongoDBConnector.get_instance()
+        db = mongo_client[get_config("DB_NAME_DATA_SOURCES")]
+        filter_by = {
+            "orgId": user_details.org_id,
+            "projectId": user_details.project_id,
+            "connectorId": source_details.connector_id,
+            "bucketName": source_details.database_name,
+        }
+        collection = db[get_config("COL_NAME_DATA_SOURCES_CSV_DELIMITERS")]
+        projection = {"_id": 0, "objectName": 1}
+        projection.update({field_name: 1 for field_name in OBJECT_DELIMITERS_FIELDS})
+        object_filter = dict(filter_by)
+        if object_names is not None:
+            object_filter["objectName"] = {"$in": list(set(object_names))}
+            limit = 0
+        else:
+            max_objects = get_numeric_config(
+                "ALBANERO_DELIMITERS_CACHE_MAX_OBJECTS",
+                DEFAULT_DELIMITERS_CACHE_MAX_OBJECTS,
+                int,
+            )
+            # One more document than the cap tells that the bucket is too large to be cached
+            limit = max_objects + 1
+        documents = list(collection.find(object_filter, projection, limit=limit))
+        object_delimiters = {}
+        if limit and len(documents) == limit:
+            object_delimiters = None
+            logger.debug(
+                f"Bucket {source_details.database_name} has more than {max_objects} files with delimiters, "
+                "their delimiters are fetched per file.",
+                source_details.job_id,
+            )
+        else:
+            for document in documents:
+                object_name = document.pop("objectName", None)
+                if object_name is not None:
+                    object_delimiters.setdefault(object_name, document)
+        collection = db[get_config("COL_NAME_DATA_SOURCES_DEFAULT_BUCKET_DELIMITERS")]
+        projection = {"_id": 0}
+        projection.update({field_name: 1 for field_name in BUCKET_DELIMITERS_FIELDS})
+        bucket_delimiters = collection.find_one(filter_by, projection)
+        logger.debug(
+            lambda: f"Loaded the delimiters of {len(object_delimiters or ())} files of bucket {source_details.database_name}.",
+            source_details.job_id,
+        )
+        return BucketDelimiters(object_delimiters, bucket_delimiters)
+    @staticmethod
     def __get_delimiters_from_db(source_details: S3Table, user_details: UserDetails):
         """
         Retrieve delimiters from the database if they are present.
@@ -91,7 +315,8 @@ class DelimitersConfig:
             logger.debug("No delimiters found in the database.", source_details.job_id)
             return None
         logger.debug(
-            f"Delimiters found in the database: {results[0]}", source_details.job_id
+            lambda: f"Delimiters found in the database: {results[0]}",
+            source_details.job_id,
         )
         return results[0]
     @staticmethod
@@ -134,7 +359,7 @@ class DelimitersConfig:
             )
             return None
         logger.debug(
-            f"Bucket-level delimiters found in the database: {results[0]}",
+            lambda: f"Bucket-level delimiters found in the database: {results[0]}",
             source_details.job_id,
         )
         return results[0]
@@ -155,6 +380,92 @@ class DelimitersConfig:
         mongo_client = MongoDBConnector.get_instance()
         db = mongo_client[get_config("DB_NAME_DATA_SOURCES")]
         collection = db[get_config("COL_NAME_DATA_SOURCES_CSV_DELIMITERS")]
+        filter_by, update = DelimitersConfig.__get_delimiters_update(
+            source_details, delimiters, user_details
+        )
+Uncovered code
+        collection.update_one(filter_by, update, upsert=True)
+        DelimitersConfig.__update_cached_delimiters(
+            source_details, user_details, update
+        )
+        logger.info("Delimiters are updated successfully.", source_details.job_id)
+    @staticmethod
+    def set_or_update_delimiters_many(
+        delimiters_list: List[Tuple[S3Table, dict]],
+        user_details: UserDetails,
+        chunk_size: Optional[int] = None,
+    ) -> List[DelimitersUpdateResult]:
+        """
+        Update or set the delimiters of many files, with one unordered bulk write per chunk of files.
+        A file that fails does not stop the others, its error is reported in its result.
+        Args:
+            delimiters_list (list): Pairs of source file details and the delimiters to be set for the file.
+            user_details (UserDetails): User details, including orgId. projectId, userId and username.
+            chunk_size (int, optional): Number of files written per bulk write.
+                Defaults to the ALBANERO_DELIMITERS_BULK_CHUNK_SIZE config, or 1000.
+        Returns:
+            list: A DelimitersUpdateResult for every file, in the order of delimiters_list.
+        """
+        chunk_size = chunk_size or get_numeric_config(
+            "ALBANERO_DELIMITERS_BULK_CHUNK_SIZE", DEFAULT_DELIMITERS_BULK_CHUNK_SIZE, int
+        )
+        logger.debug(
+            f"Started setting or updating the delimiters of {len(delimiters_list)} files."
+        )
+        results: List[Optional[DelimitersUpdateResult]] = [None] * len(delimiters_list)
+        operations = []
+        for index, (source_details, delimiters) in enumerate(delimiters_list):
+            try:
+                filter_by, update = DelimitersConfig.__get_delimiters_update(
+                    source_details, delimiters, user_details
+                )
+            except KeyError as e:
+                results[index] = DelimitersUpdateResult(
+                    source_details.table_name, False, f"{e} is missing"
+                )
+                continue
+            operations.append((index, update, UpdateOne(filter_by, update, upsert=True)))
+        mongo_client = MongoDBConnector.get_instance()
+        db = mongo_client[get_config("DB_NAME_DATA_SOURCES")]
+        collection = db[get_config("COL_NAME_DATA_SOURCES_CSV_DELIMITERS")]
+        for start in range(0, len(operations), chunk_size):
+            chunk = operations[start : start + chunk_size]
+            errors = {}
+            try:
+                collection.bulk_write(
+                    [operation for _, _, operation in chunk], ordered=False
+                )
+            except BulkWriteError as e:
+                for write_error in e.details.get("writeErrors", []):
+                    errors[write_error["index"]] = write_error.get("errmsg")
+            except Exception as e:
+                message = DataMeshExceptionHandler.parse_message(e)
+                errors = {chunk_index: message for chunk_index in range(len(chunk))}
+            for chunk_index, (index, update, _) in enumerate(chunk):
+                source_details = delimiters_list[index][0]
+                if chunk_index in errors:
+                    results[index] = DelimitersUpdateResult(
+                        source_details.table_name, False, errors[chunk_index]
+                    )
+                    continue
+                results[index] = DelimitersUpdateResult(source_details.table_name, True)
+                DelimitersConfig.__update_cached_delimiters(
+                    source_details, user_details, update
+                )
+        failed_count = sum(1 for result in results if not result.updated)
+        if failed_count:
+            logger.error(
+                f"Failed to set or update the delimiters of {failed_count} of {len(results)} files."
+            )
+        logger.info(
+            f"Delimiters of {len(results) - failed_count} files are updated successfully."
+        )
+        return results
+    @staticmethod
+    def __get_delimiters_update(
+        source_details: S3Table, delimiters: dict, user_details: UserDetails
+    ) -> Tuple[dict, dict]:
+        """Returns the filter and the update that set the delimiters of the source file."""
         filter_by = {
             "orgId": user_details.org_id,
             "projectId": user_details.project_id,
@@ -178,6 +489,17 @@ class DelimitersConfig:
                 },
             }
         }
-Uncovered code
-        collection.update_one(filter_by, update, upsert=True)
-        logger.info("Delimiters are updated successfully.", source_details.job_id)
\ No newline at end of file
+        return filter_by, update
+    @staticmethod
+    def __update_cached_delimiters(
+        source_details: S3Table, user_details: UserDetails, update: dict
+    ) -> None:
+        bucket = delimiters_cache.get(
+            DelimitersConfig.__get_delimiters_cache_key(source_details, user_details)
+        )
+        if bucket is not None and bucket.object_delimiters is not None:
+            # The cached bucket is kept, with the delimiters as a database read would return them
+            bucket.object_delimiters[source_details.table_name] = {
+                field_name: update["$set"][field_name]
+                for field_name in OBJECT_DELIMITERS_FIELDS
+            }
\ No newline at end of file
@@ -3,6 +3,7 @@ from ..enums import DataFormats
 from ..storage.mongo import MongoDBConnector
 from ..utils import helpers
 from ..utils.apicaller import ApiCaller
+from ..utils.dataclass_loaders import load_dataclass
 from ..config_loader import get_config
 from ..utils import logger
 from ..exceptions.exception_handler import DataMeshExceptionHandler
@@ -211,7 +212,7 @@ def get_multi_table_metadata(
                         "sourceType": table_info.source_type,
                         "region": table_info.region,
                     }
-                    tem_table_info = S3Table.from_dict(table_details)
+                    tem_table_info = load_dataclass(S3Table, table_details)
                     result = __extract_metadata_from_table(tem_table_info, user_info)
                     if result:
                         __save_table_metadata(table_info, user_info, result)
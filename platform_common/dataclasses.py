@@ -1,10 +1,10 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from dataclass_wizard import JSONSerializable
-from typing import Optional, Dict, List
+import sys
+from typing import Optional, Dict, List, Tuple, Union, get_args, get_origin, get_type_hints
 from .enums import IncrementalReadOption, DataFormats, SourceSystems
-from .storage.mongo import MongoDBConnector
 from .utils import logger
-from .config_loader import get_config
+from .configs.catalog_index import get_catalog_index
 @dataclass
 class UserDetails(JSONSerializable):
     org_id: str
@@ -98,6 +98,11 @@ class DA2Delimiters(JSONSerializable):
             target_system,
         )
     @staticmethod
+    def get_base_table_name(table_name: str) -> str:
+        """Returns the table name looked up in the metadata db for a file name or program name."""
+        base_table_name = table_name.split("/")[-1].split(".")[0].lower()
+        return base_table_name[-8:]
+    @staticmethod
     def fetch_program_name(table_name: str, target_system: str) -> Optional[str]:
         """Fetch MetaData for the given TableName while fetching DA2/DAT Default Delimiters
         Args:
@@ -108,24 +113,37 @@ class DA2Delimiters(JSONSerializable):
         logger.debug(
             f"Asserting ProgramName from {target_system.value} MetaData db.", table_name
         )
-        base_table_name = table_name.split("/")[-1].split(".")[0].lower()
-        base_table_name = base_table_name[-8:]
-        mongo_client = MongoDBConnector.get_instance()
-        db = mongo_client[get_config("DB_NAME_LN_METADATA")]
-        if target_system == SourceSystems.LN:
-            collection_name = get_config("COL_NAME_LN_TABLE_METADATA")
-        else:
-            collection_name = get_config("COL_NAME_BAAN_TABLE_METADATA")
-        collection = db[collection_name]
-        if collection.count_documents({"tableName": base_table_name}):
+        base_table_name = DA2Delimiters.get_base_table_name(table_name)
+        if get_catalog_index(target_system).contains(base_table_name):
             logger.debug(
-                f"Found matching program name in {collection_name} for {table_name}"
+                f"Found matching program name in {target_system.value} metadata for {table_name}"
             )
             return base_table_name
         logger.debug(
             f"No matching program name found in BAAN or LN metadata for {table_name}"
         )
         return None
+    @staticmethod
+    def fetch_program_names(
+        table_names: List[str], target_system: str
+    ) -> Dict[str, Optional[str]]:
+        """Fetch the program names of many files, see fetch_program_name.
+        Args:
+            table_names (list): User provided File Names or Program Names
+        Returns:
+            dict: Program name of every given table name, None for the ones that don't exist
+        """
+        base_table_names = {
+            table_name: DA2Delimiters.get_base_table_name(table_name)
+            for table_name in table_names
+        }
+        if not base_table_names:
+            return {}
+        existing_table_names = get_catalog_index(target_system).get_table_names()
+        return {
+            table_name: base_table_name if base_table_name in existing_table_names else None
+            for table_name, base_table_name in base_table_names.items()
+        }
 @dataclass
 class DATDelimiters(DA2Delimiters):
     field_delimiter: str
@@ -178,10 +196,15 @@ class TableDetails(JSONSerializable):
         return self._requires_incremental_read
     @requires_incremental_read.setter
     def requires_incremental_read(self, requires_incremental_read: str):
+        # Set with object.__setattr__, so that frozen compact variants can set it in __init__
         if isinstance(requires_incremental_read, str):
-            self._requires_incremental_read = requires_incremental_read.upper()
+            object.__setattr__(
+                self, "_requires_incremental_read", requires_incremental_read.upper()
+            )
         else:
-            self._requires_incremental_read = IncrementalReadOption.NO
+            object.__setattr__(
+                self, "_requires_incremental_read", IncrementalReadOption.NO
+            )
 @dataclass
 class DeltaLakeTable(TableDetails, JSONSerializable):
     version: Optional[int] = None
@@ -249,4 +272,145 @@ class ProfilingResults(JSONSerializable):
     connector_id: str
     table_name: str
     database_name: str
-    length_histogram: Optional[bool] = False
\ No newline at end of file
+    length_histogram: Optional[bool] = False
+# Attributes that are generated for every dataclass and must not be copied to its compact variant
+DATACLASS_GENERATED_ATTRIBUTES = {
+    "__dict__",
+    "__weakref__",
+    "__slots__",
+    "__annotations__",
+    "__dataclass_fields__",
+    "__dataclass_params__",
+    "__init__",
+    "__repr__",
+    "__eq__",
+    "__hash__",
+    "__match_args__",
+    "__setattr__",
+    "__delattr__",
+    "__getstate__",
+    "__setstate__",
+    "__module__",
+    "__qualname__",
+    "__doc__",
+    "__abstractmethods__",
+    "_abc_impl",
+}
+compact_models: Dict[Tuple[type, bool], type] = {}
+def freeze_value(value):
+    """Returns a hashable equivalent of a field value, lists become tuples and dicts frozensets of their items."""
+    if isinstance(value, dict):
+        return frozenset((key, freeze_value(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze_value(item) for item in value)
+    return value
+def compact_annotation(annotation, frozen: bool):
+    """Replaces the JSONSerializable dataclasses of a field annotation with their compact variants."""
+    if (
+        isinstance(annotation, type)
+        and issubclass(annotation, JSONSerializable)
+        and hasattr(annotation, "__dataclass_fields__")
+    ):
+        return compact_model(annotation, frozen)
+    if get_origin(annotation) is Union:
+        return Union[
+            tuple(compact_annotation(member, frozen) for member in get_args(annotation))
+        ]
+    return annotation
+def restore_compact_instance(cls: type, frozen: bool, values: tuple):
+    """Recreates a pickled compact instance from the values of its slots, without calling __init__."""
+    model = compact_model(cls, frozen)
+    instance = object.__new__(model)
+    for slot, value in zip(model.__slots__, values):
+        object.__setattr__(instance, slot, value)
+    return instance
+def compact_model(cls: type, frozen: bool = False) -> type:
+    """
+    Returns a slotted variant of a JSONSerializable dataclass, e.g. UserDetails or S3Table.
+    Instances of the variant have no __dict__, which makes them several times smaller, and with frozen=True
+    their fields cannot be reassigned. The variant has the same fields, defaults, properties and methods,
+    so from_dict, to_dict and the requires_incremental_read property of TableDetails behave the same.
+    Nested dataclass fields, e.g. the ConnectionConfig of a table, use the compact variant of their class.
+    Frozen variants are hashable: list and dict values such as merge_keys or columns are hashed by content,
+    so they must not be mutated in place while the instance is used as a key.
+    The variant is a separate class, it is not a subclass of the original dataclass. It is bound under its
+    name in the module of the original class, and its instances can be pickled.
+    Usage:
+        CompactUserDetails = compact_model(UserDetails)
+        user_details = CompactUserDetails.from_dict(payload)
+    Args:
+        cls (type): JSONSerializable dataclass.
+        frozen (bool, optional): Whether the fields of the instances can be reassigned.
+    Returns:
+        type: The compact variant, created once per class and frozen flag.
+    """
+    key = (cls, frozen)
+    if key in compact_models:
+        return compact_models[key]
+    namespace = {}
+    for klass in reversed(cls.__mro__):
+        if not hasattr(klass, "__dataclass_fields__"):
+            continue
+        for name, value in vars(klass).items():
+            if name not in DATACLASS_GENERATED_ATTRIBUTES:
+                namespace[name] = value
+    type_hints = get_type_hints(cls)
+    annotations = {}
+    # Properties that are also fields, their values are kept in a "_" prefixed slot by their setter
+    property_fields = []
+    for model_field in fields(cls):
+        annotations[model_field.name] = compact_annotation(
+            type_hints[model_field.name], frozen
+        )
+        default = model_field.default
+        if isinstance(default, property):
+            property_fields.append(model_field.name)
+        namespace[model_field.name] = field(
+            default=default,
+            default_factory=model_field.default_factory,
+            init=model_field.init,
+            repr=model_field.repr,
+            compare=model_field.compare,
+            kw_only=model_field.kw_only,
+        )
+    namespace["__annotations__"] = annotations
+    namespace["__module__"] = cls.__module__
+    namespace["__doc__"] = cls.__doc__
+    name = f"{'FrozenCompact' if frozen else 'Compact'}{cls.__name__}"
+    model = dataclass(frozen=frozen)(type(cls)(name, (JSONSerializable,), namespace))
+    # Same as dataclass(slots=True), which does not support fields that are properties
+    class_dict = dict(model.__dict__)
+    for model_field in fields(model):
+        if model_field.name not in property_fields:
+            class_dict.pop(model_field.name, None)
+    class_dict.pop("__dict__", None)
+    class_dict.pop("__weakref__", None)
+    slots = tuple(
+        model_field.name
+        for model_field in fields(model)
+        if model_field.name not in property_fields
+    ) + tuple(f"_{field_name}" for field_name in property_fields)
+    class_dict["__slots__"] = slots
+    if frozen:
+        compared_fields = [
+            model_field.name for model_field in fields(model) if model_field.compare
+        ]
+        def __hash__(self):
+            return hash(
+                tuple(freeze_value(getattr(self, name)) for name in compared_fields)
+            )
+        class_dict["__hash__"] = __hash__
+    def __reduce__(self):
+        return (
+            restore_compact_instance,
+            (cls, frozen, tuple(getattr(self, slot) for slot in slots)),
+        )
+    class_dict["__reduce__"] = __reduce__
+    compact = type(model)(name, model.__bases__, class_dict)
+    module = sys.modules.get(cls.__module__)
+    if module is not None and not hasattr(module, name):
+        setattr(module, name, compact)
+    compact_models[key] = compact
+    return compact
\ No newline at end of file
@@ -59,7 +59,7 @@ def __get_datastore(
             "connectorId": connector_id,
         }
         result = collection.find_one(filter_by, projection=project)
-        logger.debug(f"Successfully fetched the datastore details:{result}")
+        logger.debug(lambda: f"Successfully fetched the datastore details:{result}")
         return result
     except Exception as err:
         message = DataMeshExceptionHandler.parse_message(err)
@@ -93,7 +93,7 @@ def __get_database(
             "connectorId": connector_id,
         }
         result = collection.find_one(filter_by, projection=project)
-        logger.debug(f"Successfully fetched the database details: {result}")
+        logger.debug(lambda: f"Successfully fetched the database details: {result}")
         return result
     except Exception as err:
         message = DataMeshExceptionHandler.parse_message(err)
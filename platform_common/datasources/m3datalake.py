@@ -46,7 +46,7 @@ def get_m3_datalake_config(
             {"_id": 0},
         )
         if result:
-            logger.debug(f"Configuration details retrieved: {result}")
+            logger.debug(lambda: f"Configuration details retrieved: {result}")
             logger.debug(
                 f"[{connector_id}]: Successfully retrieved the M3 datalake connection conifg(ion api data)"
             )
@@ -82,7 +82,7 @@ def get_m3_datalake_program_metadata(program_name: str) -> dict:
         )
         if result:
             logger.debug(
-                f" Successfully fetched the metadata for M3 program {program_name}: {result}"
+                lambda: f" Successfully fetched the metadata for M3 program {program_name}: {result}"
             )
             return result
         else:
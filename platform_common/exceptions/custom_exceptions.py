@@ -116,5 +116,18 @@ class ServiceRegistrationFailed(Exception):
         self.message = f"Service registration with IAM failed."
         super().__init__(self.message)
 Uncovered code
+    def __str__(self):
+        return self.message
+class GeventConfigurationException(Exception):
+    def __init__(self, message) -> None:
+        self.message = f"Gevent mode is misconfigured: {message}"
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+class KafkaDeliveryFailedException(Exception):
+    def __init__(self, failed_deliveries: list) -> None:
+        self.failed_deliveries = failed_deliveries
+        self.message = f"Failed to deliver {len(failed_deliveries)} Kafka message(s)."
+        super().__init__(self.message)
     def __str__(self):
         return self.message
\ No newline at end of file
@@ -27,64 +27,134 @@ from .unsupported_format import (
     ConnectionNotFoundException,
     ColumnsNotFoundException,
 )
+import logging
+from typing import Callable, Dict, NamedTuple, Optional, Type
 from flask import request, jsonify
 from ..utils import logger
+CORS_ALLOW_HEADERS = (
+    "authorization,content-type,x-Org-Id,x-Project-Id,x-Username,x-Service-Token"
+)
+CORS_ALLOW_METHODS = "GET,PUT,POST,DELETE,OPTIONS"
+DEFAULT_ERROR_STATUS_CODE = 400
+# Set on an exception once its traceback is logged
+TRACEBACK_LOGGED_ATTRIBUTE = "_platform_traceback_logged"
+class ExceptionClassification(NamedTuple):
+    get_message: Callable[[Exception], str]
+    status_code: int
+LIBRARY_EXCEPTIONS = (
+    S3BucketAccessDenied,
+    S3BucketNotFound,
+    ExistingMongoConnection,
+    ExistingKafkaConnection,
+    UnsupportedDataSourceException,
+    EnvironmentConfigMissing,
+    IonAPIFetchException,
+    UnsupportedFormatException,
+    ColumnLimitExceededException,
+    DelimiterUpdateFailedException,
+    M3ProgramMetadataRetrievalFailure,
+    ColumnsNotFoundException,
+    S3ObjectNotFound,
+    MetadataFetchFailedException,
+    DatabaseOrDataStoreDetailsRetrievalException,
+    SaveMetadataFailedException,
+    EnvironmentNameMissing,
+    ConnectionNotFound,
+    M3ProgramNotFound,
+    EC2InstanceNotFoundException,
+    PythonLibraryConfigFileNotFound,
+    ConnectionNotFoundException,
+    UnableToGenerateM3TokenException,
+    UnableToFetchUserDetailsException,
+    DatameshConfigurationExceptions,
+    DA2MetaDataNotFound,
+    DATMetaDataNotFound,
+)
+def is_traceback_logged(err: BaseException) -> bool:
+    """Returns True if the traceback of the exception, or of an exception it was raised from, was logged."""
+    seen = set()
+    while err is not None and id(err) not in seen:
+        if getattr(err, TRACEBACK_LOGGED_ATTRIBUTE, False):
+            return True
+        seen.add(id(err))
+        err = err.__cause__ or err.__context__
+    return False
+def log_exception(err: BaseException, stack_depth: int = 1) -> None:
+    """
+    Logs the traceback once per exception, later calls for the same failure only log the message.
+    stack_depth is the frame that logs the error for rate limiting, 1 being the caller of log_exception,
+    so that errors logged from different places are never counted as one call site.
+    """
+    if is_traceback_logged(err):
+        logger.log(
+            logging.ERROR, f"Error occurred:{str(err)}", stack_depth=stack_depth + 1
+        )
+        return
+    logger.log(
+        logging.ERROR,
+        f"Error occurred:{str(err)}",
+        exc_info=err,
+        stack_depth=stack_depth + 1,
+    )
+    try:
+        setattr(err, TRACEBACK_LOGGED_ATTRIBUTE, True)
+    except AttributeError:
+        pass
 class DataMeshExceptionHandler:
-    """Order of below conditions is important, please do not change it"""
+    """
+    Converts exceptions to the message and HTTP status returned to clients.
+    Exceptions are classified by type through a registry, falling back along the MRO, so a subclass
+    of a registered exception is classified like its parent unless it is registered itself.
+    """
+    exception_registry: Dict[Type[BaseException], ExceptionClassification] = {}
+    # Classification resolved for every exception type seen so far, None for unregistered types
+    classification_cache: Dict[type, Optional[ExceptionClassification]] = {}
+    @classmethod
+    def register_exception(
+        cls,
+        exception_type: Type[BaseException],
+        get_message: Callable[[Exception], str] = str,
+        status_code: int = DEFAULT_ERROR_STATUS_CODE,
+    ) -> None:
+        """
+        Registers how an exception type is reported to clients.
+        Args:
+            exception_type (type): Exception class, its subclasses are classified the same way.
+            get_message (callable, optional): Returns the message of an exception. Defaults to str.
+            status_code (int, optional): HTTP status returned by handle_exception. Defaults to 400.
+        """
+        cls.exception_registry[exception_type] = ExceptionClassification(
+            get_message, status_code
+        )
+        cls.classification_cache = {}
+    @classmethod
+    def classify(cls, err: BaseException) -> Optional[ExceptionClassification]:
+        exception_type = type(err)
+        try:
+            return cls.classification_cache[exception_type]
+        except KeyError:
+            pass
+        classification = None
+        for base_type in exception_type.__mro__:
+            classification = cls.exception_registry.get(base_type)
+            if classification is not None:
+                break
+        cls.classification_cache[exception_type] = classification
+        return classification
     @classmethod
     def parse_message(cls, err: Exception, return_err: bool = False):
-        message = None
-        logger.exception(f"Error occurred:{str(err)}")
-        if isinstance(err, (S3BucketAccessDenied, S3BucketNotFound)):
-            message = str(err)
-        elif isinstance(
-            err,
-            (
-                ExistingMongoConnection,
-                ExistingKafkaConnection,
-                UnsupportedDataSourceException,
-                EnvironmentConfigMissing,
-                IonAPIFetchException,
-                UnsupportedFormatException,
-                ColumnLimitExceededException,
-                DelimiterUpdateFailedException,
-                M3ProgramMetadataRetrievalFailure,
-                ColumnsNotFoundException,
-                S3ObjectNotFound,
-                MetadataFetchFailedException,
-                DatabaseOrDataStoreDetailsRetrievalException,
-                SaveMetadataFailedException,
-                EnvironmentNameMissing,
-                ConnectionNotFound,
-                M3ProgramNotFound,
-                EC2InstanceNotFoundException,
-                PythonLibraryConfigFileNotFound,
-                ConnectionNotFoundException,
-                UnableToGenerateM3TokenException,
-                UnableToFetchUserDetailsException,
-                DatameshConfigurationExceptions,
-                DA2MetaDataNotFound,
-                DATMetaDataNotFound,
-            ),
-        ):
-            message = str(err)
-        elif isinstance(err, KeyError):
-            message = f"{str(err)} is missing"
-        elif return_err:
+        log_exception(err, stack_depth=2)
+        classification = cls.classify(err)
+        if classification is not None:
+            return classification.get_message(err)
+        if return_err:
             return err
-        else:
-            message = str(err)
-        return message
+        return str(err)
     @classmethod
     def handle_cors(cls, response):
         response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add(
-            "Access-Control-Allow-Headers",
-            "authorization,content-type,x-Org-Id,x-Project-Id,x-Username,x-Service-Token",
-        )
-        response.headers.add(
-            "Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS"
-        )
+        response.headers.add("Access-Control-Allow-Headers", CORS_ALLOW_HEADERS)
+        response.headers.add("Access-Control-Allow-Methods", CORS_ALLOW_METHODS)
         response.headers.add("Access-Control-Allow-Credentials", "true")
         if request.method == "OPTIONS":
             response.status = 200
@@ -92,9 +162,12 @@ class DataMeshExceptionHandler:
     @classmethod
     def handle_exception(cls, e):
         if hasattr(e, "original_exception"):
-            message = DataMeshExceptionHandler.parse_message(e.original_exception)
-        else:
-            message = DataMeshExceptionHandler.parse_message(e)
+            e = e.original_exception
+        message = DataMeshExceptionHandler.parse_message(e)
+        classification = DataMeshExceptionHandler.classify(e)
+        status_code = (
+            classification.status_code if classification else DEFAULT_ERROR_STATUS_CODE
+        )
         if message:
             data = {
                 "message": message,
@@ -102,6 +175,9 @@ class DataMeshExceptionHandler:
                 "payload": None,
             }
 New code
-            return jsonify(data), 400
+            return jsonify(data), status_code
 Uncovered code
-        return jsonify({}), 500
\ No newline at end of file
+        return jsonify({}), 500
+for library_exception in LIBRARY_EXCEPTIONS:
+    DataMeshExceptionHandler.register_exception(library_exception)
+DataMeshExceptionHandler.register_exception(KeyError, lambda err: f"{str(err)} is missing")
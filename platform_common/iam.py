@@ -1,5 +1,14 @@
 import re
+import json
+import base64
+import hashlib
+import threading
+from time import time
+from concurrent.futures import Future
+from dataclasses import replace
 from .utils.apicaller import ApiCaller
+from .utils.cache import TTLCache
+from .utils.concurrency import run_concurrently, map_concurrently
 from flask import request, jsonify, Request
 from .exceptions.exception_handler import DataMeshExceptionHandler
 from .exceptions.custom_exceptions import (
@@ -7,11 +16,19 @@ from .exceptions.custom_exceptions import (
     TokenGenerationExceptions,
 )
 from .utils import logger
-from .config_loader import get_config
-from typing import Union
+from .config_loader import get_config, get_numeric_config
+from typing import Union, List, Optional
 from .dataclasses import UserDetails
 from typing import Dict
 content_type = "application/json"
+DEFAULT_AUTH_CACHE_TTL_SEC = 60
+auth_cache = TTLCache(ttl_sec=DEFAULT_AUTH_CACHE_TTL_SEC)
+DEFAULT_INTERNAL_TOKEN_CACHE_TTL_SEC = 300
+DEFAULT_TOKEN_GENERATION_MAX_CONCURRENCY = 8
+TOKEN_EXPIRY_MARGIN_SEC = 30
+internal_token_cache = TTLCache(ttl_sec=DEFAULT_INTERNAL_TOKEN_CACHE_TTL_SEC)
+in_flight_tokens: Dict[str, Future] = {}
+in_flight_tokens_lock = threading.Lock()
 class IAM:
     @staticmethod
     def authenticate():
@@ -138,34 +155,192 @@ class IAM:
                 500,
             )
     @staticmethod
-    def generate_token(user_id: str) -> Union[str, None]:
-        """Generate a new access token for the given user"""
+    def authenticate_and_authorize():
+        """
+        This method combines authenticate and authorize into a single hook.
+        The token validation and the route authorization requests are sent to IAM concurrently.
+        The resulting user details are cached by token hash, org, project and route, so repeated
+        requests with the same token skip both IAM calls until the cache entry expires.
+        """
         try:
-            logger.debug("Started generate_token function.")
-            auth_headers = {
-                "x-secret": get_config("ALBANERO_TOKEN_SERVICE_SECRET_KEY"),
-                "Content-Type": content_type,
+            if is_request_exceptional(request):
+                return
+            token = request.headers.get("Authorization")
+            if token is None:
+                logger.debug("Authentication token is missing.")
+                return (
+                    jsonify(
+                        {
+                            "message": "Authentication token is missing.",
+                            "success": False,
+                        }
+                    ),
+                    401,
+                )
+            org_id = request.headers.get("X-Org-Id")
+            project_id = request.headers.get("X-Project-Id")
+            if org_id is None or project_id is None:
+                logger.debug("Authorization headers are missing.")
+                return (
+                    jsonify(
+                        {
+                            "message": "Authorization headers are missing.",
+                            "success": False,
+                        }
+                    ),
+                    403,
+                )
+            cache_key = (
+                hashlib.sha256(token.encode("utf-8")).hexdigest(),
+                org_id,
+                project_id,
+                request.method,
+                request.path,
+            )
+            cached_user_details = auth_cache.get(cache_key)
+            if cached_user_details is not None:
+                request.user_details = replace(cached_user_details)
+                return
+            authentication_api = (
+                f"{get_config('ALBANERO_BASE_ROUTE_URI')}/auth/api/token/validate"
+            )
+            authorization_api = (
+                f"{get_config('ALBANERO_BASE_ROUTE_URI')}/auth-user/api/authorize-route"
+            )
+            data = {
+                "apiRoute": request.path,
+                "apiMethod": request.method,
+                "orgDetails": {
+                    "orgId": org_id,
+                    "roleId": None,
+                },
+                "projectLevelDetails": {
+                    "projectId": project_id,
+                    "roleId": None,
+                },
             }
-            token_gen_api = (
-                f"{get_config('ALBANERO_BASE_ROUTE_URI')}/auth/api/internal-token"
+            authentication_response, authorization_response = run_concurrently(
+                [
+                    lambda: ApiCaller.get(
+                        url=authentication_api,
+                        headers={"Authorization": token, "Content-Type": content_type},
+                    ),
+                    lambda: ApiCaller.post(
+                        url=authorization_api,
+                        data=data,
+                        headers={"Authorization": token, "Content-Type": content_type},
+                    ),
+                ]
             )
-            response = ApiCaller.get(
-                url=token_gen_api, headers=auth_headers, params={"userId": user_id}
+            if authentication_response.status_code != 200:
+                message = authentication_response.text
+                logger.exception(
+                    f"message: {message}, route: {authentication_api}, response: {authentication_response.json()}"
+                )
+                return (jsonify({"message": message, "success": False}), 401)
+            if (
+                authorization_response.status_code != 200
+                or authorization_response.json()["success"] != True
+            ):
+                message = authorization_response.text
+                if authorization_response.json().get("message"):
+                    message = authorization_response.json().get("message")
+                logger.exception(
+                    f"message: {message}, route: {authorization_api}, payload: {data}, response: {authorization_response.json()}"
+                )
+                return jsonify({"message": message, "success": False}), 403
+            response_data = authentication_response.json()["payload"]
+            user_details: UserDetails = UserDetails.from_dict(
+                {
+                    "orgId": org_id,
+                    "projectId": project_id,
+                    "userId": response_data["userId"],
+                    "username": response_data["username"],
+                    "token": token,
+                    "email": response_data["emailId"],
+                    "fullName": f"{response_data['firstName']} {response_data['lastName']}",
+                }
             )
-            if response.status_code == 200:
-                response_data = response.json()
-                raw_token = response_data["payload"]["token"]
-                bearer_token = f"Bearer {raw_token}"
-                logger.debug("Exiting generate_token function.")
-                return bearer_token
-            else:
-                message = f"Failed to generate token for user_id [{user_id}], Error: {response.text}"
-                logger.exception(message)
-                raise TokenGenerationExceptions(message)
+            auth_cache.set(
+                cache_key,
+                user_details,
+                get_numeric_config(
+                    "ALBANERO_AUTH_CACHE_TTL_SEC", DEFAULT_AUTH_CACHE_TTL_SEC
+                ),
+            )
+            request.user_details = replace(user_details)
         except Exception as e:
             message = DataMeshExceptionHandler.parse_message(e)
-            logger.exception(message)
-            raise TokenGenerationExceptions(message)
+            logger.exception(f"Exception occurred during authorization: {message}")
+            return (
+                jsonify(
+                    {
+                        "message": "Request failed during authorization.",
+                        "success": False,
+                    }
+                ),
+                500,
+            )
+    @staticmethod
+    def generate_token(user_id: str, use_cache: bool = True) -> Union[str, None]:
+        """
+        Generate a new access token for the given user.
+        Tokens are cached per user until shortly before they expire, and concurrent calls
+        for the same user share a single request to IAM.
+        Args:
+            user_id (str): Unique identifier of the user.
+            use_cache (bool, optional): If False, a fresh token is minted even when a cached one exists.
+        Returns:
+            str: Bearer token for the user.
+        """
+        if use_cache:
+            bearer_token = internal_token_cache.get(user_id)
+            if bearer_token is not None:
+                return bearer_token
+        with in_flight_tokens_lock:
+            token_future = in_flight_tokens.get(user_id)
+            is_owner = token_future is None
+            if is_owner:
+                token_future = Future()
+                in_flight_tokens[user_id] = token_future
+        if not is_owner:
+            return token_future.result()
+        try:
+            bearer_token = request_internal_token(user_id)
+            internal_token_cache.set(
+                user_id, bearer_token, get_internal_token_ttl_sec(bearer_token)
+            )
+            token_future.set_result(bearer_token)
+            return bearer_token
+        except Exception as e:
+            token_future.set_exception(e)
+            raise
+        finally:
+            with in_flight_tokens_lock:
+                in_flight_tokens.pop(user_id, None)
+    @staticmethod
+    def generate_tokens(
+        user_ids: List[str], max_concurrency: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Generate access tokens for many users at once.
+        Duplicate user ids are requested only once and cached tokens are reused.
+        Args:
+            user_ids (list): Unique identifiers of the users.
+            max_concurrency (int, optional): Maximum number of token requests in flight at the same time.
+        Returns:
+            dict: Bearer tokens keyed by user id.
+        """
+        unique_user_ids = list(dict.fromkeys(user_ids))
+        max_concurrency = max_concurrency or get_numeric_config(
+            "ALBANERO_TOKEN_GENERATION_MAX_CONCURRENCY",
+            DEFAULT_TOKEN_GENERATION_MAX_CONCURRENCY,
+            int,
+        )
+        bearer_tokens = map_concurrently(
+            IAM.generate_token, unique_user_ids, max_concurrency
+        )
+        return dict(zip(unique_user_ids, bearer_tokens))
     @staticmethod
     def get_user_details(user_id: str, user_details: UserDetails) -> Dict[str, any]:
         """
@@ -190,6 +365,50 @@ class IAM:
             return response_in_json["payload"]
         elif response.status_code >= 400 and response.status_code <= 500:
             raise UnableToFetchUserDetailsException(user_id)
+def request_internal_token(user_id: str) -> str:
+    """Requests a new internal access token for the given user from IAM"""
+    try:
+        logger.debug("Started generate_token function.")
+        auth_headers = {
+            "x-secret": get_config("ALBANERO_TOKEN_SERVICE_SECRET_KEY"),
+            "Content-Type": content_type,
+        }
+        token_gen_api = (
+            f"{get_config('ALBANERO_BASE_ROUTE_URI')}/auth/api/internal-token"
+        )
+        response = ApiCaller.get(
+            url=token_gen_api, headers=auth_headers, params={"userId": user_id}
+        )
+        if response.status_code == 200:
+            response_data = response.json()
+            raw_token = response_data["payload"]["token"]
+            bearer_token = f"Bearer {raw_token}"
+            logger.debug("Exiting generate_token function.")
+            return bearer_token
+        else:
+            message = f"Failed to generate token for user_id [{user_id}], Error: {response.text}"
+            logger.exception(message)
+            raise TokenGenerationExceptions(message)
+    except Exception as e:
+        message = DataMeshExceptionHandler.parse_message(e)
+        logger.exception(message)
+        raise TokenGenerationExceptions(message)
+def get_internal_token_ttl_sec(bearer_token: str) -> float:
+    """
+    Returns how long the given token may be cached.
+    The expiry is read from the token's "exp" claim when present, less a safety margin,
+    otherwise the configured default TTL is used.
+    """
+    default_ttl_sec = get_numeric_config(
+        "ALBANERO_INTERNAL_TOKEN_CACHE_TTL_SEC", DEFAULT_INTERNAL_TOKEN_CACHE_TTL_SEC
+    )
+    try:
+        payload = bearer_token.split(" ")[-1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        expires_at = json.loads(base64.urlsafe_b64decode(payload))["exp"]
+        return expires_at - time() - TOKEN_EXPIRY_MARGIN_SEC
+    except Exception:
+        return default_ttl_sec
 New code
 def is_request_exceptional(request: Request) -> bool:
     path = request.path.lower()
@@ -0,0 +1,281 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from time import monotonic, perf_counter, time
+from typing import Callable, Dict, List, Optional, Tuple
+from kafka import ConsumerRebalanceListener, TopicPartition
+from kafka.errors import CommitFailedError
+from kafka.structs import OffsetAndMetadata
+from .kafka import KafkaConnector
+from .retry import RetryPolicy, get_not_before_ms
+from ..utils import logger
+from ..utils.metrics import registry
+from ..exceptions.exception_handler import DataMeshExceptionHandler
+DEFAULT_POLL_TIMEOUT_MS = 1000
+DEFAULT_MAX_POLL_RECORDS = 500
+DEFAULT_FAILURE_BACKOFF_SEC = 5
+class BatchResult:
+    """Outcome of processing one polled batch of a partition."""
+    def __init__(self, next_offset: Optional[int], failed_offset: Optional[int] = None):
+        self.next_offset = next_offset
+        self.failed_offset = failed_offset
+class BatchConsumer:
+    """
+    A consumer runner that polls Kafka in batches and processes the records on a bounded worker pool.
+    The records of a partition are handled in order by one worker at a time, while different partitions
+    are handled in parallel. Offsets are committed only after the records are processed, so auto commit
+    is always disabled. A partition is paused while it has a batch in flight, and every partition is paused
+    while the number of batches in flight is at max_pending_batches.
+    When the handler raises and a retry_policy is given, the record is forwarded to the next retry topic,
+    or to the dead-letter topic, and the partition moves on. The retry topics are consumed by the same runner,
+    and a retry partition is paused until its next record is due, so delayed records never stall other partitions.
+    Without a retry_policy, the offsets processed before the failing record are committed and the partition
+    is rewound to the failing record, which is retried after failure_backoff_sec.
+    Usage:
+        consumer = BatchConsumer(["job-status"], {"group_id": "status-service"}, handler)
+        consumer.run()
+    Args:
+        topics (list): Topics to which the consumer subscribes.
+        consumer_config (dict): Kafka consumer configuration, see KafkaConnector.get_consumer.
+        handler (callable): Called with every ConsumerRecord. Use serializers.decode_record(record)
+            to decode its value.
+        max_workers (int, optional): Number of worker threads.
+        max_pending_batches (int, optional): Batches in flight after which all partitions are paused.
+            Defaults to twice the number of workers.
+        poll_timeout_ms (int, optional): Maximum time to block in each poll.
+        failure_backoff_sec (float, optional): Delay before a failed record is retried.
+        retry_policy (RetryPolicy, optional): Retry and dead-letter topics for failed records.
+    """
+    def __init__(
+        self,
+        topics: List[str],
+        consumer_config: dict,
+        handler: Callable,
+        max_workers: int = 8,
+        max_pending_batches: Optional[int] = None,
+        poll_timeout_ms: int = DEFAULT_POLL_TIMEOUT_MS,
+        failure_backoff_sec: float = DEFAULT_FAILURE_BACKOFF_SEC,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.topics = topics
+        self.retry_policy = retry_policy
+        if retry_policy is not None:
+            self.topics = topics + retry_policy.retry_topics(topics)
+        self.consumer_config = dict(consumer_config)
+        self.consumer_config["enable_auto_commit"] = False
+        self.consumer_config.setdefault("max_poll_records", DEFAULT_MAX_POLL_RECORDS)
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending_batches = max_pending_batches or max_workers * 2
+        self.poll_timeout_ms = poll_timeout_ms
+        self.failure_backoff_sec = failure_backoff_sec
+        self.consumer = None
+        self.executor = None
+        self.running = False
+        self.in_flight: Dict[TopicPartition, Future] = {}
+        self.completed = queue.Queue()
+        self.resume_at: Dict[TopicPartition, float] = {}
+        self.partition_lag: Dict[TopicPartition, int] = {}
+        self.metrics_lock = threading.Lock()
+        self.processed_count = 0
+        self.failed_count = 0
+        self.processing_time_ms_total = 0.0
+        self.processing_time_ms_max = 0.0
+        self.started_at = None
+    def run(self) -> None:
+        """Consumes until stop() is called, then finishes the batches in flight and commits their offsets."""
+        self.consumer = KafkaConnector.get_consumer([], self.consumer_config)
+        self.consumer.subscribe(
+            topics=self.topics, listener=BatchConsumerRebalanceListener(self)
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.running = True
+        self.started_at = monotonic()
+        metrics_name = f"kafka.batch_consumer.{self.consumer_config.get('group_id')}"
+        registry.register_collector(metrics_name, self.get_metrics)
+        logger.info(f"Batch consumer started for topics {self.topics}.")
+        try:
+            while self.running:
+                self.commit_completed()
+                self.update_paused_partitions()
+                records = self.consumer.poll(timeout_ms=self.poll_timeout_ms)
+                for topic_partition, batch in records.items():
+                    self.dispatch(topic_partition, batch)
+                self.update_partition_lag()
+        finally:
+            self.finish_in_flight(list(self.in_flight))
+            self.executor.shutdown(wait=True)
+            self.consumer.close()
+            registry.unregister_collector(metrics_name)
+            logger.info(f"Batch consumer stopped for topics {self.topics}.")
+    def stop(self) -> None:
+        self.running = False
+    def dispatch(self, topic_partition: TopicPartition, batch: list) -> None:
+        if self.retry_policy is not None:
+            batch = self.hold_records_not_due(topic_partition, batch)
+            if not batch:
+                return
+        self.consumer.pause(topic_partition)
+        future = self.executor.submit(self.process_batch, batch)
+        self.in_flight[topic_partition] = future
+        future.add_done_callback(
+            lambda done: self.completed.put((topic_partition, done))
+        )
+    def hold_records_not_due(
+        self, topic_partition: TopicPartition, batch: list
+    ) -> list:
+        """
+        Returns the records of the batch that are due for processing.
+        Records of a retry tier share one delay, so they become due in offset order. The partition is
+        rewound to the first record that is not due yet and paused until that record is due.
+        """
+        now_ms = time() * 1000
+        for index, record in enumerate(batch):
+            not_before_ms = get_not_before_ms(record)
+            if not_before_ms > now_ms:
+                self.consumer.seek(topic_partition, record.offset)
+                self.resume_at[topic_partition] = monotonic() + (
+                    (not_before_ms - now_ms) / 1000
+                )
+                return batch[:index]
+        return batch
+    def process_batch(self, batch: list) -> BatchResult:
+        next_offset = None
+        for record in batch:
+            started_at = perf_counter()
+            try:
+                self.handler(record)
+            except Exception as e:
+                message = DataMeshExceptionHandler.parse_message(e)
+                logger.error(
+                    f"Failed to process record {record.topic}-{record.partition}@{record.offset}: {message}"
+                )
+                with self.metrics_lock:
+                    self.failed_count += 1
+                if self.retry_policy is None or not self.forward_failed_record(
+                    record, e
+                ):
+                    return BatchResult(next_offset, record.offset)
+                next_offset = record.offset + 1
+                continue
+            processing_time_ms = (perf_counter() - started_at) * 1000
+            with self.metrics_lock:
+                self.processed_count += 1
+                self.processing_time_ms_total += processing_time_ms
+                self.processing_time_ms_max = max(
+                    self.processing_time_ms_max, processing_time_ms
+                )
+            next_offset = record.offset + 1
+        return BatchResult(next_offset)
+    def forward_failed_record(self, record, error: Exception) -> bool:
+        try:
+            self.retry_policy.forward_failed_record(record, error)
+            return True
+        except Exception as e:
+            message = DataMeshExceptionHandler.parse_message(e)
+            logger.error(
+                f"Failed to forward record {record.topic}-{record.partition}@{record.offset} for retry: {message}"
+            )
+            return False
+    def commit_completed(self) -> None:
+        """Commits the offsets of the finished batches, must be called from the polling thread."""
+        finished_batches = []
+        while True:
+            try:
+                finished_batches.append(self.completed.get_nowait())
+            except queue.Empty:
+                break
+        self.complete(finished_batches)
+    def finish_in_flight(self, topic_partitions: List[TopicPartition]) -> None:
+        """Waits for the batches of the given partitions and commits their offsets."""
+        batches = []
+        for topic_partition in topic_partitions:
+            future = self.in_flight.get(topic_partition)
+            if future is not None:
+                future.exception()
+                batches.append((topic_partition, future))
+        self.complete(batches)
+    def complete(self, batches: List[Tuple[TopicPartition, Future]]) -> None:
+        offsets = {}
+        for topic_partition, future in batches:
+            # A batch finished by a revoke stays queued in completed, and its partition
+            # may have a newer batch in flight by the time the entry is read
+            if self.in_flight.get(topic_partition) is not future:
+                continue
+            del self.in_flight[topic_partition]
+            result: BatchResult = future.result()
+            if result.next_offset is not None:
+                offsets[topic_partition] = OffsetAndMetadata(result.next_offset, None)
+            if result.failed_offset is not None:
+                self.handle_failed_batch(topic_partition, result)
+        if not offsets:
+            return
+        try:
+            self.consumer.commit(offsets=offsets)
+        except CommitFailedError as e:
+            logger.error(f"Failed to commit offsets {offsets}: {e}")
+    def handle_failed_batch(
+        self, topic_partition: TopicPartition, result: BatchResult
+    ) -> None:
+        if topic_partition not in self.consumer.assignment():
+            return
+        self.consumer.seek(topic_partition, result.failed_offset)
+        self.resume_at[topic_partition] = monotonic() + self.failure_backoff_sec
+    def update_paused_partitions(self) -> None:
+        assignment = self.consumer.assignment()
+        now = monotonic()
+        for topic_partition, resume_at in list(self.resume_at.items()):
+            if resume_at <= now or topic_partition not in assignment:
+                del self.resume_at[topic_partition]
+        if len(self.in_flight) >= self.max_pending_batches:
+            paused = set(assignment)
+        else:
+            paused = (set(self.in_flight) | set(self.resume_at)) & assignment
+        currently_paused = self.consumer.paused()
+        if paused - currently_paused:
+            self.consumer.pause(*(paused - currently_paused))
+        if currently_paused - paused:
+            self.consumer.resume(*(currently_paused - paused))
+    def update_partition_lag(self) -> None:
+        for topic_partition in self.consumer.assignment():
+            highwater = self.consumer.highwater(topic_partition)
+            if highwater is None:
+                continue
+            committed = self.consumer.committed(topic_partition) or 0
+            self.partition_lag[topic_partition] = max(highwater - committed, 0)
+    def get_metrics(self) -> dict:
+        """
+        Returns the consumer metrics.
+        Returns:
+            dict: processed and failed record counts, throughput, processing times, batches in flight and lag by partition.
+        """
+        with self.metrics_lock:
+            processed_count = self.processed_count
+            failed_count = self.failed_count
+            processing_time_ms_total = self.processing_time_ms_total
+            processing_time_ms_max = self.processing_time_ms_max
+        elapsed_sec = monotonic() - self.started_at if self.started_at else 0
+        return {
+            "processedCount": processed_count,
+            "failedCount": failed_count,
+            "throughputPerSec": processed_count / elapsed_sec if elapsed_sec else 0.0,
+            "avgProcessingTimeMs": (
+                processing_time_ms_total / processed_count if processed_count else 0.0
+            ),
+            "maxProcessingTimeMs": processing_time_ms_max,
+            "inFlightBatches": len(self.in_flight),
+            "lag": {
+                f"{topic_partition.topic}-{topic_partition.partition}": lag
+                for topic_partition, lag in dict(self.partition_lag).items()
+            },
+        }
+class BatchConsumerRebalanceListener(ConsumerRebalanceListener):
+    def __init__(self, batch_consumer: BatchConsumer):
+        self.batch_consumer = batch_consumer
+    def on_partitions_revoked(self, revoked):
+        # Finish and commit the revoked partitions before another consumer takes them over
+        self.batch_consumer.finish_in_flight(list(revoked))
+        for topic_partition in revoked:
+            self.batch_consumer.partition_lag.pop(topic_partition, None)
+    def on_partitions_assigned(self, assigned):
+        pass
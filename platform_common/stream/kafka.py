@@ -1,26 +1,233 @@
 from kafka import KafkaProducer, KafkaConsumer
-import json
-from ..utils import datetime_encoder
-from ..config_loader import get_config
-from ..exceptions.custom_exceptions import ExistingKafkaConnection
+from kafka.errors import KafkaTimeoutError
+import atexit
+import itertools
+import math
+import threading
+import weakref
+from collections import deque
+from time import monotonic, perf_counter, time
+from . import serializers
+from ..config_loader import (
+    get_config,
+    get_config_or_default,
+    get_json_config,
+    get_numeric_config,
+)
+from ..exceptions.custom_exceptions import (
+    ExistingKafkaConnection,
+    KafkaDeliveryFailedException,
+)
 from ..utils import logger, secrets_manager
+from ..utils.metrics import registry
 from ..enums import Environments
 import os
 import tempfile
+from typing import Callable, Iterable, Optional
 CONSUMER_POLL_INTERVAL_SEC = 0.5
+SEND_TIMEOUT_SEC = 60
+MAX_TRACKED_FAILED_DELIVERIES = 10000
+PRODUCER_PROFILE_OPTIONS = {
+    "linger_ms",
+    "batch_size",
+    "compression_type",
+    "acks",
+    "max_in_flight_requests_per_connection",
+}
+COMPRESSION_TYPES = {None, "gzip", "snappy", "lz4", "zstd"}
+DEFAULT_KAFKA_CERT_REFRESH_SEC = 3600
+PRODUCER_METRIC_NAMES = (
+    "request-latency-avg",
+    "request-latency-max",
+    "batch-size-avg",
+    "batch-size-max",
+    "record-queue-time-avg",
+    "record-queue-time-max",
+    "record-send-rate",
+    "record-error-rate",
+    "bufferpool-wait-ratio",
+)
+CONSUMER_METRIC_NAMES = (
+    "fetch-latency-avg",
+    "fetch-latency-max",
+    "fetch-rate",
+    "records-consumed-rate",
+    "records-lag-max",
+)
+consumer_ids = itertools.count(1)
 kafka_producer = None
-def create_temp_file(content: str) -> str:
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+# Resolved once per process, see get_kafka_config
+kafka_config_cache = None
+kafka_config_loaded_at = 0.0
+kafka_config_lock = threading.Lock()
+kafka_cert_content = None
+kafka_cert_path = None
+# The pid of the process that wrote kafka_cert_path, forked workers inherit the path but do not own the file
+kafka_cert_owner_pid = None
+# The raw ALBANERO_KAFKA_PRODUCER_PROFILES value and the profiles parsed from it
+producer_profiles_cache = (None, {})
+def remove_kafka_cert_file() -> None:
+    # Registered before a fork, so it also runs in the workers, which must not remove the file of their parent
+    if (
+        kafka_cert_path
+        and kafka_cert_owner_pid == os.getpid()
+        and os.path.exists(kafka_cert_path)
+    ):
+        os.remove(kafka_cert_path)
+def write_kafka_cert_file(content: str) -> str:
+    """
+    Writes the certificate to a stable path owned by this process, replacing the previous one atomically,
+    so that clients which are already connected never read a partially written file.
+    A forked worker writes its own file instead of the one of its parent, which other workers may still use.
+    """
+    global kafka_cert_path, kafka_cert_owner_pid
+    if kafka_cert_path is None:
+        atexit.register(remove_kafka_cert_file)
+    if kafka_cert_owner_pid != os.getpid():
+        kafka_cert_owner_pid = os.getpid()
+        kafka_cert_path = os.path.join(
+            tempfile.gettempdir(), f"platform-kafka-ca-{kafka_cert_owner_pid}.pem"
+        )
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(kafka_cert_path), delete=False
+    ) as temp_file:
         temp_file.write(content.encode("utf-8"))
-        temp_file_name = temp_file.name
-        return temp_file_name
+    os.replace(temp_file.name, kafka_cert_path)
+    return kafka_cert_path
 def get_kafka_cert_path() -> str:
+    """Returns the path of the Kafka CA certificate, the file is rewritten only when the secret has rotated."""
+    global kafka_cert_content
     platform_env = os.environ.get("PLATFORM_ENVIRONMENT_NAME")
     secret_name = f"{platform_env}/kafka-cert"
     kafka_secret = secrets_manager.get_secret_by_name(secret_name)
-    cert_file_path = create_temp_file(kafka_secret["cert"])
-    return cert_file_path
+    if kafka_secret["cert"] != kafka_cert_content or not os.path.exists(
+        kafka_cert_path
+    ):
+        if kafka_cert_content is not None:
+            logger.info("Kafka CA certificate has rotated, rewriting the certificate file.")
+        write_kafka_cert_file(kafka_secret["cert"])
+        kafka_cert_content = kafka_secret["cert"]
+    return kafka_cert_path
+def get_producer_profiles() -> dict:
+    """Returns the parsed ALBANERO_KAFKA_PRODUCER_PROFILES, which are parsed again only when the config changes."""
+    global producer_profiles_cache
+    config_value = get_config_or_default("ALBANERO_KAFKA_PRODUCER_PROFILES")
+    cached_config_value, profiles = producer_profiles_cache
+    if config_value is not cached_config_value:
+        profiles = get_json_config("ALBANERO_KAFKA_PRODUCER_PROFILES", {})
+        producer_profiles_cache = (config_value, profiles)
+    return profiles
+def get_producer_profile(topic: str) -> Optional[dict]:
+    """
+    Returns the producer profile configured for the topic in ALBANERO_KAFKA_PRODUCER_PROFILES, if any.
+    The profiles may also be configured as a JSON string.
+    Example config:
+        "ALBANERO_KAFKA_PRODUCER_PROFILES": {
+            "job-status": {"linger_ms": 20, "batch_size": 131072, "compression_type": "lz4", "acks": 1}
+        }
+    Raises:
+        ValueError: The profile is not a JSON object, or contains an unsupported option or compression type.
+    """
+    profile = get_producer_profiles().get(topic)
+    if not profile:
+        return None
+    if not isinstance(profile, dict):
+        raise ValueError(
+            f"The producer profile of topic '{topic}' is not a JSON object: {profile!r}"
+        )
+    unsupported_options = set(profile) - PRODUCER_PROFILE_OPTIONS
+    if unsupported_options:
+        raise ValueError(
+            f"Unsupported producer profile options for topic '{topic}': {sorted(unsupported_options)}"
+        )
+    if profile.get("compression_type") not in COMPRESSION_TYPES:
+        raise ValueError(
+            f"Unsupported compression type for topic '{topic}': {profile['compression_type']}"
+        )
+    return profile
+def get_buffer_utilization(kafka_producer: KafkaProducer) -> Optional[float]:
+    """Returns the fraction of the producer's buffer memory that holds unsent batches."""
+    # kafka-python has no metric for the buffer memory, so the free buffers of the accumulator's pool are counted
+    buffer_pool = getattr(getattr(kafka_producer, "_accumulator", None), "_free", None)
+    batch_size = kafka_producer.config["batch_size"]
+    total_buffers = int(kafka_producer.config["buffer_memory"] / batch_size) if batch_size else 0
+    if buffer_pool is None or not total_buffers:
+        return None
+    return 1 - len(buffer_pool._free) / total_buffers
+def select_metrics(kafka_metrics: dict, metric_names: tuple) -> dict:
+    # kafka-python reports -inf for a max without samples, which is not valid JSON
+    metrics = {}
+    for name in metric_names:
+        value = kafka_metrics.get(name)
+        metrics[name] = value if value is None or math.isfinite(value) else None
+    return metrics
+def get_producer_metrics(kafka_producer: KafkaProducer) -> dict:
+    producer_metrics = kafka_producer.metrics().get("producer-metrics", {})
+    metrics = select_metrics(producer_metrics, PRODUCER_METRIC_NAMES)
+    metrics["buffer-utilization"] = get_buffer_utilization(kafka_producer)
+    return metrics
+def get_consumer_lag(consumer: KafkaConsumer) -> dict:
+    """Returns the lag of every assigned partition, from the last fetched highwater and the fetch position."""
+    lag = {}
+    for topic_partition in consumer.assignment():
+        # The position is read from the subscription state, as consumer.position() may block on a fetch
+        partition_state = consumer._subscription.assignment.get(topic_partition)
+        if partition_state is None:
+            continue
+        if partition_state.highwater is None or partition_state.position is None:
+            continue
+        lag[f"{topic_partition.topic}-{topic_partition.partition}"] = max(
+            partition_state.highwater - partition_state.position, 0
+        )
+    return lag
+def get_consumer_metrics(consumer: KafkaConsumer) -> dict:
+    fetch_metrics = {}
+    for group, group_metrics in consumer.metrics().items():
+        if group.endswith("-fetch-manager-metrics"):
+            fetch_metrics = group_metrics
+            break
+    metrics = select_metrics(fetch_metrics, CONSUMER_METRIC_NAMES)
+    metrics["lag"] = get_consumer_lag(consumer)
+    return metrics
+def register_consumer_metrics(consumer: KafkaConsumer, group_id: Optional[str]) -> None:
+    collector_name = f"kafka.consumer.{group_id}.{next(consumer_ids)}"
+    consumer_ref = weakref.ref(consumer)
+    def collect() -> Optional[dict]:
+        consumer = consumer_ref()
+        if consumer is None or consumer._closed:
+            registry.unregister_collector(collector_name)
+            return None
+        return get_consumer_metrics(consumer)
+    registry.register_collector(collector_name, collect)
+def get_producer_name(producer_options: dict) -> str:
+    if not producer_options:
+        return "default"
+    return ",".join(f"{name}={value}" for name, value in sorted(producer_options.items()))
 def get_kafka_config() -> dict:
+    """
+    Returns the Kafka client config, resolved once per process and shared by every producer and consumer.
+    The certificate secret is read again every ALBANERO_KAFKA_CERT_REFRESH_SEC seconds to pick up rotations.
+    Returns:
+        dict: A copy of the config, callers may update it.
+    """
+    global kafka_config_cache, kafka_config_loaded_at
+    refresh_sec = get_numeric_config(
+        "ALBANERO_KAFKA_CERT_REFRESH_SEC", DEFAULT_KAFKA_CERT_REFRESH_SEC
+    )
+    with kafka_config_lock:
+        if (
+            kafka_config_cache is None
+            or monotonic() - kafka_config_loaded_at >= refresh_sec
+        ):
+            try:
+                kafka_config_cache = load_kafka_config()
+            except Exception as err:
+                if kafka_config_cache is None:
+                    raise err
+                logger.warning(f"Failed to refresh the Kafka config, using the cached config: {err}")
+            kafka_config_loaded_at = monotonic()
+        return dict(kafka_config_cache)
+def load_kafka_config() -> dict:
     is_dev_mode = (
         os.environ.get("ALBANERO_SERVICE_ENVIRONMENT") == Environments.DEVELOPMENT
     )
@@ -66,6 +273,10 @@ class KafkaConnector:
     Methods:
         send_message(topic, message):
             Sends a message to the specified topic in Kafka.
+        send_many(topic, messages, key_fn):
+            Sends many messages to the specified topic and waits for all of them once.
+        flush():
+            Waits until all the asynchronously sent messages are delivered.
         consumer(topics, process_status_message):
             Listens to all the messages and processes them accordingly in the function process_status_message.
     Note:
@@ -73,28 +284,255 @@ class KafkaConnector:
         as it can introduce global state and make code harder to test and reason about.
     """
     producer = None
+    profile_producers = {}
+    profile_producers_lock = threading.Lock()
+    failed_deliveries = deque(maxlen=MAX_TRACKED_FAILED_DELIVERIES)
+    failed_deliveries_lock = threading.Lock()
+    shutdown_hook_registered = False
     def __init__(self):
         if KafkaConnector.producer is not None:
             raise ExistingKafkaConnection()
         else:
-            kafka_config = get_kafka_config()
-            kafka_producer = KafkaProducer(
-                value_serializer=lambda v: json.dumps(
-                    v, cls=datetime_encoder.DateTimeEncoder
-                ).encode("utf-8"),
-                **kafka_config,
-            )
-            KafkaConnector.producer = kafka_producer
+            KafkaConnector.producer = KafkaConnector.create_producer()
             logger.debug("Kafka connector established.")
     @staticmethod
-    def send_message(topic, message, key=None):
-        if KafkaConnector.producer is None:
-            KafkaConnector()
+    def create_producer(**producer_options) -> KafkaProducer:
+        kafka_config = get_kafka_config()
+        # Values are serialized in send_message, so that the content-type header can be set alongside
+        kafka_producer = KafkaProducer(**kafka_config, **producer_options)
+        registry.register_collector(
+            f"kafka.producer.{get_producer_name(producer_options)}",
+            lambda: get_producer_metrics(kafka_producer),
+        )
+        if not KafkaConnector.shutdown_hook_registered:
+            atexit.register(KafkaConnector.shutdown)
+            KafkaConnector.shutdown_hook_registered = True
+        return kafka_producer
+    @staticmethod
+    def get_producer(topic: str) -> KafkaProducer:
+        """
+        Returns the producer for the topic.
+        Topics with a producer profile get a dedicated producer, shared by all topics with an identical profile.
+        Every other topic uses the default producer.
+        """
+        profile = get_producer_profile(topic)
+        if not profile:
+            if KafkaConnector.producer is None:
+                KafkaConnector()
+            return KafkaConnector.producer
+        profile_key = tuple(sorted(profile.items()))
+        kafka_producer = KafkaConnector.profile_producers.get(profile_key)
+        if kafka_producer is None:
+            with KafkaConnector.profile_producers_lock:
+                kafka_producer = KafkaConnector.profile_producers.get(profile_key)
+                if kafka_producer is None:
+                    kafka_producer = KafkaConnector.create_producer(**profile)
+                    KafkaConnector.profile_producers[profile_key] = kafka_producer
+                    logger.debug(f"Kafka producer created for profile {profile}.")
+        return kafka_producer
+    @staticmethod
+    def send_message(
+        topic,
+        message,
+        key=None,
+        block=True,
+        on_delivery=None,
+        content_type=None,
+        headers=None,
+    ):
+        """
+        Sends a message to the specified topic in Kafka.
+        Args:
+            topic (str): Topic to which the message is sent.
+            message: Message to be sent. Bytes are sent as they are, anything else is serialized
+                with the serializer registered for the content type.
+            key (str or bytes, optional): Message key.
+            block (bool, optional): If True, waits until the broker acknowledges the message.
+                If False, returns as soon as the message is queued in the producer. Failed deliveries are then
+                tracked in KafkaConnector.failed_deliveries. Defaults to True.
+            on_delivery (callable, optional): Called as on_delivery(error, record_metadata) when the delivery completes,
+                error is None on success. Errors raised by this call, e.g. a failed blocking delivery, are reported to it first.
+            content_type (str, optional): Content type used to serialize the message, written to the content-type header.
+                Defaults to the ALBANERO_KAFKA_CONTENT_TYPE config, or JSON.
+            headers (list, optional): Additional (key, bytes) message headers.
+        Returns:
+            FutureRecordMetadata: Future that resolves to the metadata of the delivered record.
+        """
+        kafka_producer = KafkaConnector.get_producer(topic)
         # Kafka producer expects the key to be of type bytes, bytearray, memoryview, or None. Hence changing key to bytes.
-        if key is not None:
+        if isinstance(key, str):
             key = key.encode("utf-8")
-        KafkaConnector.producer.send(topic, value=message, key=key).get(timeout=60)
-        logger.debug(f"Message sent to topic '{topic}': {message}")
+        headers = list(headers or [])
+        if not any(
+            header_key == serializers.CONTENT_TYPE_HEADER for header_key, _ in headers
+        ):
+            content_type = content_type or get_config_or_default(
+                "ALBANERO_KAFKA_CONTENT_TYPE", serializers.JSON_CONTENT_TYPE
+            )
+            headers.append(
+                (serializers.CONTENT_TYPE_HEADER, content_type.encode("utf-8"))
+            )
+        value = serializers.serialize(
+            message, serializers.get_content_type(headers)
+        )
+        started_at = perf_counter()
+        try:
+            future = kafka_producer.send(topic, value=value, key=key, headers=headers)
+            if block:
+                record_metadata = future.get(timeout=SEND_TIMEOUT_SEC)
+        except Exception as e:
+            registry.increment(f"kafka.producer.errors.{topic}")
+            if on_delivery:
+                on_delivery(e, None)
+            raise
+        if block:
+            KafkaConnector.record_delivery(topic, started_at)
+            logger.debug(lambda: f"Message sent to topic '{topic}': {message}")
+            if on_delivery:
+                on_delivery(None, record_metadata)
+            return future
+        def on_success(record_metadata):
+            KafkaConnector.record_delivery(topic, started_at)
+            if on_delivery:
+                on_delivery(None, record_metadata)
+        def on_failure(error):
+            registry.increment(f"kafka.producer.errors.{topic}")
+            KafkaConnector.track_failed_delivery(topic, message, key, error)
+            if on_delivery:
+                on_delivery(error, None)
+        future.add_callback(on_success)
+        future.add_errback(on_failure)
+        return future
+    @staticmethod
+    def send_many(
+        topic: str,
+        messages: Iterable,
+        key_fn: Optional[Callable] = None,
+        timeout: float = SEND_TIMEOUT_SEC,
+    ) -> int:
+        """
+        Sends many messages to the topic without waiting for each acknowledgement,
+        so the producer can batch and compress them according to the topic's producer profile.
+        Args:
+            topic (str): Topic to which the messages are sent.
+            messages (Iterable): Messages to be sent.
+            key_fn (callable, optional): Returns the key for a given message.
+            timeout (float, optional): Maximum number of seconds to wait for the deliveries.
+        Returns:
+            int: Number of messages delivered within the timeout. Failed deliveries are tracked in
+                KafkaConnector.failed_deliveries, including the ones still pending at the timeout once they fail.
+        """
+        futures = [
+            KafkaConnector.send_message(
+                topic, message, key_fn(message) if key_fn else None, block=False
+            )
+            for message in messages
+        ]
+        try:
+            KafkaConnector.get_producer(topic).flush(timeout=timeout)
+        except KafkaTimeoutError:
+            pending_count = sum(1 for future in futures if not future.is_done)
+            logger.warning(
+                f"{pending_count} of {len(futures)} messages to topic '{topic}' were still pending after {timeout}s."
+            )
+        delivered_count = sum(1 for future in futures if future.succeeded())
+        logger.debug(
+            f"Sent {delivered_count} of {len(futures)} messages to topic '{topic}'."
+        )
+        return delivered_count
+    @staticmethod
+    def record_delivery(topic: str, started_at: float) -> None:
+        registry.increment(f"kafka.producer.sent.{topic}")
+        registry.record_time(
+            f"kafka.producer.send_latency_ms.{topic}",
+            (perf_counter() - started_at) * 1000,
+        )
+    @staticmethod
+    def get_health() -> dict:
+        """
+        Returns the buffer utilization of every producer and the lag by partition of every consumer.
+        Returns:
+            dict: {"producers": {name: buffer utilization}, "consumers": {name: {partition: lag}}}
+        """
+        health = {"producers": {}, "consumers": {}}
+        for name, metrics in registry.snapshot()["collectors"].items():
+            if name.startswith("kafka.producer."):
+                health["producers"][name] = metrics.get("buffer-utilization")
+            elif name.startswith("kafka.consumer."):
+                health["consumers"][name] = metrics.get("lag")
+        return health
+    @staticmethod
+    def track_failed_delivery(topic, message, key, error) -> None:
+        logger.error(f"Failed to deliver message to topic '{topic}': {error}")
+        with KafkaConnector.failed_deliveries_lock:
+            KafkaConnector.failed_deliveries.append(
+                {
+                    "topic": topic,
+                    # Keys forwarded from retry topics can be any bytes
+                    "key": (
+                        bytes(key).decode("utf-8", errors="replace")
+                        if key is not None
+                        else None
+                    ),
+                    "message": message,
+                    "error": str(error),
+                    "failedAt": round(time() * 1000),
+                }
+            )
+    @staticmethod
+    def get_failed_deliveries(clear: bool = True) -> list:
+        """Returns the messages whose asynchronous delivery failed, oldest first."""
+        with KafkaConnector.failed_deliveries_lock:
+            failed_deliveries = list(KafkaConnector.failed_deliveries)
+            if clear:
+                KafkaConnector.failed_deliveries.clear()
+        return failed_deliveries
+    @staticmethod
+    def flush(timeout: float = None, raise_on_failure: bool = False) -> None:
+        """
+        Waits until all the queued messages are delivered or have failed.
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait.
+            raise_on_failure (bool, optional): If True, raises KafkaDeliveryFailedException when
+                any delivery failed since the failures were last read.
+        """
+        for kafka_producer in KafkaConnector.get_producers():
+            kafka_producer.flush(timeout=timeout)
+        if raise_on_failure:
+            failed_deliveries = KafkaConnector.get_failed_deliveries()
+            if failed_deliveries:
+                raise KafkaDeliveryFailedException(failed_deliveries)
+    @staticmethod
+    def get_producers() -> list:
+        """Returns the default producer and all the profile producers that have been created."""
+        kafka_producers = list(KafkaConnector.profile_producers.values())
+        if KafkaConnector.producer is not None:
+            kafka_producers.insert(0, KafkaConnector.producer)
+        return kafka_producers
+    @staticmethod
+    def shutdown(timeout: float = SEND_TIMEOUT_SEC) -> None:
+        """Flushes the pending messages and closes the producers, registered to run at interpreter exit."""
+        kafka_producers = KafkaConnector.get_producers()
+        if not kafka_producers:
+            return
+        KafkaConnector.producer = None
+        KafkaConnector.profile_producers = {}
+        registry.unregister_collectors("kafka.producer.")
+        for kafka_producer in kafka_producers:
+            try:
+                kafka_producer.flush(timeout=timeout)
+            except Exception as e:
+                logger.error(f"Failed to flush a Kafka producer at shutdown: {e}")
+            try:
+                kafka_producer.close(timeout=timeout)
+            except Exception as e:
+                logger.error(f"Failed to close a Kafka producer at shutdown: {e}")
+        failed_deliveries = KafkaConnector.get_failed_deliveries(clear=False)
+        if failed_deliveries:
+            logger.error(
+                f"{len(failed_deliveries)} Kafka message(s) could not be delivered before shutdown."
+            )
+        logger.debug("Kafka connector closed.")
     @staticmethod
     def get_consumer(
         topics: list,
@@ -110,7 +548,8 @@ class KafkaConnector:
                     - 'enable_auto_commit' (bool): If True, consumer offsets are committed automatically.
                     - 'auto_commit_interval_ms' (int): Interval at which offsets are committed.
                     - 'key_deserializer' (callable): Deserializer for the message key.
-                    - 'value_deserializer' (callable): Deserializer for the message value.
+                    - 'value_deserializer' (callable): Deserializer for the message value. Leave it unset and use
+                      serializers.decode_record(record) to pick the decoder from the content-type header.
                     - 'max_poll_records' (int): Maximum number of records to poll in each call.
                     - 'max_poll_interval_ms' (int): Maximum time between poll calls.
                     - 'session_timeout_ms' (int): Timeout to detect consumer failures.
@@ -120,4 +559,5 @@ class KafkaConnector:
         kafka_config = get_kafka_config()
         consumer_config.update(kafka_config)
         consumer = KafkaConsumer(*topics, **consumer_config)
+        register_consumer_metrics(consumer, consumer_config.get("group_id"))
         return consumer
@@ -0,0 +1,97 @@
+from time import time
+from typing import List, Optional, Sequence
+from .kafka import KafkaConnector
+from ..utils import logger
+RETRY_ATTEMPT_HEADER = "x-retry-attempt"
+RETRY_ERROR_HEADER = "x-retry-error"
+RETRY_NOT_BEFORE_HEADER = "x-retry-not-before"
+ORIGINAL_TOPIC_HEADER = "x-original-topic"
+RETRY_HEADERS = {
+    RETRY_ATTEMPT_HEADER,
+    RETRY_ERROR_HEADER,
+    RETRY_NOT_BEFORE_HEADER,
+    ORIGINAL_TOPIC_HEADER,
+}
+DEFAULT_RETRY_DELAYS_SEC = (10, 60, 600)
+MAX_ERROR_HEADER_LENGTH = 1000
+def get_header(record, header_name: str) -> Optional[str]:
+    for header_key, header_value in record.headers or ():
+        if header_key == header_name and header_value is not None:
+            return header_value.decode("utf-8")
+    return None
+def get_retry_attempt(record) -> int:
+    """Returns how many times the record has already failed, 0 for records of the main topic."""
+    return int(get_header(record, RETRY_ATTEMPT_HEADER) or 0)
+def get_original_topic(record) -> str:
+    return get_header(record, ORIGINAL_TOPIC_HEADER) or record.topic
+def get_not_before_ms(record) -> int:
+    """Returns the epoch time in ms before which the record must not be processed, 0 if it is due."""
+    return int(get_header(record, RETRY_NOT_BEFORE_HEADER) or 0)
+class RetryPolicy:
+    """
+    Tiered retry topics with delayed redelivery, followed by a dead-letter topic.
+    A record that fails on "orders" is sent to "orders.retry.1" to be retried after the first delay,
+    then to "orders.retry.2" and so on. Once every tier has failed it is sent to "orders.dlt".
+    Headers on the forwarded record carry the attempt count, the last error, the original topic and
+    the time before which the record must not be retried.
+    Usage:
+        consumer = BatchConsumer(["orders"], config, handler, retry_policy=RetryPolicy((10, 60, 600)))
+    Args:
+        delays_sec (Sequence[float], optional): Redelivery delay of each retry tier.
+        retry_topic_suffix (str, optional): Suffix of the retry topics.
+        dead_letter_topic_suffix (str, optional): Suffix of the dead-letter topic.
+    """
+    def __init__(
+        self,
+        delays_sec: Sequence[float] = DEFAULT_RETRY_DELAYS_SEC,
+        retry_topic_suffix: str = "retry",
+        dead_letter_topic_suffix: str = "dlt",
+    ):
+        self.delays_sec = list(delays_sec)
+        self.retry_topic_suffix = retry_topic_suffix
+        self.dead_letter_topic_suffix = dead_letter_topic_suffix
+    def retry_topic(self, topic: str, attempt: int) -> str:
+        return f"{topic}.{self.retry_topic_suffix}.{attempt}"
+    def dead_letter_topic(self, topic: str) -> str:
+        return f"{topic}.{self.dead_letter_topic_suffix}"
+    def retry_topics(self, topics: List[str]) -> List[str]:
+        """Returns the retry topics of all the given topics."""
+        return [
+            self.retry_topic(topic, attempt)
+            for topic in topics
+            for attempt in range(1, len(self.delays_sec) + 1)
+        ]
+    def forward_failed_record(self, record, error: Exception) -> str:
+        """
+        Sends the failed record to its next retry tier, or to the dead-letter topic once the tiers are exhausted.
+        The record value is forwarded as it was consumed, along with its original headers.
+        Returns:
+            str: Topic to which the record was sent.
+        """
+        attempt = get_retry_attempt(record) + 1
+        original_topic = get_original_topic(record)
+        headers = [
+            (header_key, header_value)
+            for header_key, header_value in record.headers or ()
+            if header_key not in RETRY_HEADERS
+        ]
+        headers.append((RETRY_ATTEMPT_HEADER, str(attempt).encode("utf-8")))
+        headers.append(
+            (RETRY_ERROR_HEADER, str(error)[:MAX_ERROR_HEADER_LENGTH].encode("utf-8"))
+        )
+        headers.append((ORIGINAL_TOPIC_HEADER, original_topic.encode("utf-8")))
+        if attempt <= len(self.delays_sec):
+            destination_topic = self.retry_topic(original_topic, attempt)
+            not_before_ms = round((time() + self.delays_sec[attempt - 1]) * 1000)
+            headers.append(
+                (RETRY_NOT_BEFORE_HEADER, str(not_before_ms).encode("utf-8"))
+            )
+        else:
+            destination_topic = self.dead_letter_topic(original_topic)
+        KafkaConnector.send_message(
+            destination_topic, record.value, key=record.key, headers=headers
+        )
+        logger.warning(
+            f"Record {record.topic}-{record.partition}@{record.offset} failed on attempt {attempt}, sent to '{destination_topic}'."
+        )
+        return destination_topic
@@ -0,0 +1,85 @@
+import datetime
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+CONTENT_TYPE_HEADER = "content-type"
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+def encode_default(obj):
+    # Mirrors DateTimeEncoder: dates are written in ISO format, other unknown types as null
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+json_encoder = json.JSONEncoder(default=encode_default)
+def encode_json(value: Any) -> bytes:
+    """Encodes the value as JSON, using orjson when it is installed and the standard library otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value, default=encode_default, option=orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            # e.g. integers wider than 64 bits, which only the standard library encoder supports
+            pass
+    return json_encoder.encode(value).encode("utf-8")
+def decode_json(data: bytes) -> Any:
+    # Note: orjson decodes integers wider than 64 bits as floats
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+def encode_msgpack(value: Any) -> bytes:
+    return msgpack.packb(value, default=encode_default, use_bin_type=True)
+def decode_msgpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+serializers: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    JSON_CONTENT_TYPE: (encode_json, decode_json),
+}
+if msgpack is not None:
+    serializers[MSGPACK_CONTENT_TYPE] = (encode_msgpack, decode_msgpack)
+def register_serializer(
+    content_type: str,
+    encoder: Callable[[Any], bytes],
+    decoder: Callable[[bytes], Any],
+) -> None:
+    """
+    Registers an encoder and decoder pair for the given content type.
+    Args:
+        content_type (str): Content type written in the message headers, e.g. "application/json".
+        encoder (callable): Converts a message to bytes.
+        decoder (callable): Converts bytes back to a message.
+    """
+    serializers[content_type] = (encoder, decoder)
+def get_serializer(
+    content_type: str,
+) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    try:
+        return serializers[content_type]
+    except KeyError:
+        raise ValueError(f"No serializer is registered for content type '{content_type}'")
+def serialize(value: Any, content_type: str = JSON_CONTENT_TYPE) -> bytes:
+    """Serializes the message with the serializer of the content type, bytes are passed through as they are."""
+    if isinstance(value, (bytes, bytearray)):
+        return value
+    return get_serializer(content_type)[0](value)
+def get_content_type(headers: Optional[List[Tuple[str, bytes]]]) -> str:
+    for header_key, header_value in headers or ():
+        if header_key == CONTENT_TYPE_HEADER and header_value:
+            return header_value.decode("utf-8")
+    return JSON_CONTENT_TYPE
+def deserialize(data: bytes, headers: Optional[List[Tuple[str, bytes]]] = None) -> Any:
+    """
+    Deserializes a message with the decoder selected by its content-type header.
+    Messages without a content-type header are decoded as JSON.
+    """
+    if data is None:
+        return None
+    return get_serializer(get_content_type(headers))[1](data)
+def decode_record(record) -> Any:
+    """Deserializes the value of a ConsumerRecord polled from a consumer without a value_deserializer."""
+    return deserialize(record.value, record.headers)
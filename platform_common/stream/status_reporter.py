@@ -0,0 +1,82 @@
+import atexit
+import threading
+from typing import Dict, Optional
+from .kafka import KafkaConnector
+from ..config_loader import get_numeric_config
+from ..enums import StatusEnum
+from ..exceptions.exception_handler import DataMeshExceptionHandler
+from ..utils import logger
+DEFAULT_STATUS_FLUSH_INTERVAL_SEC = 1.0
+TERMINAL_STATUSES = {StatusEnum.DONE, StatusEnum.FAILED, StatusEnum.STOPPED}
+class JobStatusReporter:
+    """
+    Publishes job status updates to Kafka, keeping only the latest update of every job between flushes.
+    Progress updates are buffered per job_id and sent by a background thread every flush_interval_sec,
+    so the number of messages scales with the number of jobs instead of the number of updates.
+    Terminal statuses are sent immediately and discard the update buffered for the job.
+    Messages are keyed by job_id, so the updates of a job stay ordered on one partition.
+    Usage:
+        reporter = JobStatusReporter("job-status")
+        reporter.report(job_id, {"jobId": job_id, "status": StatusEnum.IN_PROGRESS, "progress": 40})
+        reporter.report(job_id, {"jobId": job_id, "status": StatusEnum.DONE})
+    Args:
+        topic (str): Topic to which the status updates are sent.
+        flush_interval_sec (float, optional): Interval between flushes of the buffered updates.
+            Defaults to the ALBANERO_STATUS_FLUSH_INTERVAL_SEC config, or 1 second.
+    """
+    def __init__(self, topic: str, flush_interval_sec: Optional[float] = None):
+        self.topic = topic
+        self.flush_interval_sec = flush_interval_sec or get_numeric_config(
+            "ALBANERO_STATUS_FLUSH_INTERVAL_SEC", DEFAULT_STATUS_FLUSH_INTERVAL_SEC
+        )
+        self.pending: Dict[str, dict] = {}
+        # Held while sending too, so that a flush never sends a stale update after a terminal status
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flush_thread = None
+    def report(self, job_id: str, message: dict, status: Optional[str] = None) -> None:
+        """
+        Reports the latest status of a job.
+        Args:
+            job_id (str): Id of the job, used as the message key.
+            message (dict): Status message to be sent.
+            status (str, optional): Status of the job. Defaults to message["status"].
+        """
+        status = status or message.get("status")
+        with self.lock:
+            if status in TERMINAL_STATUSES:
+                self.pending.pop(job_id, None)
+                self.send(job_id, message)
+                return
+            self.pending[job_id] = message
+            if self.flush_thread is None:
+                self.start()
+    def start(self) -> None:
+        # The producer is created first, so that its shutdown hook runs after this reporter is closed
+        KafkaConnector.get_producer(self.topic)
+        self.flush_thread = threading.Thread(
+            target=self.run, name="job-status-reporter", daemon=True
+        )
+        self.flush_thread.start()
+        atexit.register(self.close)
+    def run(self) -> None:
+        while not self.stopped.wait(self.flush_interval_sec):
+            self.flush()
+    def flush(self) -> None:
+        """Sends the buffered updates without waiting for their delivery."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for job_id, message in pending.items():
+                self.send(job_id, message)
+    def send(self, job_id: str, message: dict) -> None:
+        try:
+            KafkaConnector.send_message(self.topic, message, key=job_id, block=False)
+        except Exception as e:
+            message = DataMeshExceptionHandler.parse_message(e)
+            logger.error(f"Failed to send the status of job {job_id}: {message}")
+    def close(self) -> None:
+        """Stops the background thread and sends the buffered updates."""
+        self.stopped.set()
+        if self.flush_thread is not None:
+            self.flush_thread.join()
+        self.flush()
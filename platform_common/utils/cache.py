@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional
+class TTLCache:
+    """
+    A thread-safe in-memory cache whose entries expire after a time-to-live.
+    Once the cache holds max_size entries, the least recently used entry is evicted to make room for new ones.
+    Usage:
+        cache = TTLCache(ttl_sec=60)
+        cache.set(key, value)
+        value = cache.get(key)
+    """
+    def __init__(self, ttl_sec: float, max_size: int = 10000):
+        self.ttl_sec = ttl_sec
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+    def set(self, key: Hashable, value: Any, ttl_sec: Optional[float] = None) -> None:
+        """
+        Stores the value under the given key.
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to be cached.
+            ttl_sec (float, optional): Time-to-live for this entry, defaults to the cache level ttl_sec.
+        """
+        ttl_sec = self.ttl_sec if ttl_sec is None else ttl_sec
+        if ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, monotonic() + ttl_sec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,44 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional
+from . import gevent_mode
+DEFAULT_MAX_CONCURRENCY = 16
+def run_concurrently(
+    tasks: List[Callable[[], Any]], max_concurrency: Optional[int] = None
+) -> List[Any]:
+    """
+    Runs the given callables concurrently and returns their results in input order.
+    The first task runs on the calling thread, so a single task never spawns a worker.
+    In gevent mode the tasks run on a bounded greenlet pool instead of a thread pool.
+    Args:
+        tasks (list): Zero-argument callables to run.
+        max_concurrency (int, optional): Upper bound on the number of tasks running at the same time.
+    Raises:
+        Exception: The first exception raised by any of the tasks, in input order.
+    Returns:
+        list: Results of the tasks, in the same order as the tasks.
+    """
+    if not tasks:
+        return []
+    max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+    if len(tasks) == 1 or max_concurrency == 1:
+        return [task() for task in tasks]
+    # Each task runs in a copy of the caller's context, so that e.g. the log context is kept
+    tasks = [tasks[0]] + [
+        partial(contextvars.copy_context().run, task) for task in tasks[1:]
+    ]
+    if gevent_mode.is_gevent_mode_enabled():
+        from gevent.pool import Pool
+        return Pool(max_concurrency).map(lambda task: task(), tasks)
+    workers = min(len(tasks) - 1, max_concurrency - 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(task) for task in tasks[1:]]
+        results = [tasks[0]()]
+        results.extend(future.result() for future in futures)
+    return results
+def map_concurrently(
+    func: Callable[[Any], Any], items: Iterable[Any], max_concurrency: Optional[int] = None
+) -> List[Any]:
+    """Applies func to every item concurrently and returns the results in input order."""
+    return run_concurrently([partial(func, item) for item in items], max_concurrency)
@@ -0,0 +1,203 @@
+import dataclasses
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from dataclass_wizard.dumpers import get_dumper
+from dataclass_wizard.loaders import get_loader
+MAX_CACHED_KEYS_PER_CLASS = 1024
+class Fallback(Exception):
+    """Raised by a value converter when the value needs the full dataclass_wizard parsing."""
+def fallback(value):
+    raise Fallback()
+def is_simple_value(value) -> bool:
+    # The simple types are returned by dataclass_wizard's dumper as they are, str enums included
+    return value is None or isinstance(value, (str, bool, int, float))
+def convert_str_list(value):
+    if type(value) is not list or not set(map(type, value)) <= STR_TYPE:
+        raise Fallback()
+    return list(value)
+def convert_str_dict(value):
+    if (
+        type(value) is not dict
+        or not set(map(type, value)) <= STR_TYPE
+        or not set(map(type, value.values())) <= STR_TYPE
+    ):
+        raise Fallback()
+    return dict(value)
+def convert_dict(value):
+    if type(value) is not dict:
+        raise Fallback()
+    return dict(value)
+STR_TYPE = {str}
+SIMPLE_TYPES = (str, int, bool, float)
+class FieldLoader(NamedTuple):
+    """
+    How the values of a field are loaded, either kept when their type is value_type,
+    or passed through converter, which raises Fallback for values it does not handle.
+    """
+    name: str
+    nullable: bool
+    value_type: Optional[type]
+    converter: Optional[Callable]
+def get_field_loader(name: str, annotation) -> FieldLoader:
+    """
+    Returns the loader of a field, that accepts values which already have the annotated type.
+    Any other value raises Fallback, so that it is converted the way dataclass_wizard converts it.
+    """
+    nullable = False
+    if get_origin(annotation) is Union:
+        members = [member for member in get_args(annotation) if member is not type(None)]
+        if len(members) != 1:
+            return FieldLoader(name, False, None, fallback)
+        nullable = True
+        annotation = members[0]
+    origin = get_origin(annotation)
+    if annotation in SIMPLE_TYPES:
+        return FieldLoader(name, nullable, annotation, None)
+    if annotation is dict or annotation is Dict:
+        return FieldLoader(name, nullable, None, convert_dict)
+    if origin is list and get_args(annotation) == (str,):
+        return FieldLoader(name, nullable, None, convert_str_list)
+    if origin is dict and get_args(annotation) == (str, str):
+        return FieldLoader(name, nullable, None, convert_str_dict)
+    if dataclasses.is_dataclass(annotation) and hasattr(annotation, "from_dict"):
+        nested_loader = get_dataclass_loader(annotation)
+        def convert_nested(value):
+            if type(value) is not dict:
+                raise Fallback()
+            return nested_loader.load_fields(value)
+        return FieldLoader(name, nullable, None, convert_nested)
+    return FieldLoader(name, False, None, fallback)
+class DataclassLoader:
+    """
+    A loader and dumper for a JSONSerializable dataclass, compiled once per class.
+    Payload keys are resolved to fields the way dataclass_wizard resolves them, camelCase and snake_case alike,
+    and the resolution is cached per key. Values that already have the annotated type are passed to the
+    constructor directly, so properties with setters, such as TableDetails.requires_incremental_read, and
+    __post_init__ behave as they do with from_dict. Payloads with any other value, missing fields or values
+    that the constructor rejects are loaded with from_dict, which converts them or raises its usual errors.
+    Usage:
+        table = get_dataclass_loader(S3Table).load(details)
+        details = get_dataclass_loader(S3Table).dump(table)
+    Args:
+        cls (type): JSONSerializable dataclass to load and dump.
+    """
+    def __init__(self, cls: type):
+        self.cls = cls
+        fields = [field for field in dataclasses.fields(cls) if field.init]
+        type_hints = get_type_hints(cls)
+        transform_dataclass_field = get_dumper(cls).transform_dataclass_field
+        self.transform_json_field = get_loader(cls).transform_json_field
+        self.field_loaders_by_lower_name: Dict[str, FieldLoader] = {}
+        self.field_loaders_by_key: Dict[str, Optional[FieldLoader]] = {}
+        self.dump_keys: List[Tuple[str, str]] = []
+        for field in fields:
+            field_loader = get_field_loader(field.name, type_hints[field.name])
+            dump_key = transform_dataclass_field(field.name)
+            self.field_loaders_by_lower_name[field.name.lower()] = field_loader
+            self.field_loaders_by_key[field.name] = field_loader
+            self.field_loaders_by_key[dump_key] = field_loader
+            self.dump_keys.append((field.name, dump_key))
+    def get_field_loader(self, key: str) -> Optional[FieldLoader]:
+        """Returns the loader of the field that a payload key maps to, None for keys that are ignored."""
+        field_loader = self.field_loaders_by_lower_name.get(
+            self.transform_json_field(key).lower()
+        )
+        if len(self.field_loaders_by_key) < MAX_CACHED_KEYS_PER_CLASS:
+            self.field_loaders_by_key[key] = field_loader
+        return field_loader
+    def load_fields(self, data: dict):
+        """Creates an instance from the payload, raises Fallback when the payload needs from_dict."""
+        field_loaders_by_key = self.field_loaders_by_key
+        kwargs = {}
+        for key, value in data.items():
+            try:
+                field_loader = field_loaders_by_key[key]
+            except KeyError:
+                field_loader = self.get_field_loader(key)
+            if field_loader is None:
+                continue
+            name, nullable, value_type, converter = field_loader
+            if value is None and nullable:
+                kwargs[name] = None
+            elif type(value) is value_type:
+                kwargs[name] = value
+            elif converter is not None:
+                kwargs[name] = converter(value)
+            else:
+                raise Fallback()
+        try:
+            return self.cls(**kwargs)
+        except (TypeError, ValueError):
+            raise Fallback()
+    def load(self, data: dict):
+        """
+        Creates an instance of the dataclass from a payload, the same way cls.from_dict(data) does.
+        Args:
+            data (dict): Payload with camelCase or snake_case keys.
+        Returns:
+            An instance of the dataclass.
+        """
+        try:
+            return self.load_fields(data)
+        except Fallback:
+            return self.cls.from_dict(data)
+    def dump_fields(self, obj) -> dict:
+        data = {}
+        for field_name, key in self.dump_keys:
+            data[key] = dump_value(getattr(obj, field_name))
+        return data
+    def dump(self, obj) -> dict:
+        """
+        Converts an instance to a dict with camelCase keys, the same way obj.to_dict() does.
+        Args:
+            obj: Instance of the dataclass.
+        Returns:
+            dict: The fields of the instance.
+        """
+        try:
+            return self.dump_fields(obj)
+        except Fallback:
+            return obj.to_dict()
+def dump_value(value: Any):
+    if is_simple_value(value):
+        return value
+    value_type = type(value)
+    if value_type is list:
+        return [dump_value(item) for item in value]
+    if value_type is dict:
+        return {key: dump_value(item) for key, item in value.items()}
+    loader = dataclass_loaders.get(value_type)
+    if loader is not None:
+        return loader.dump_fields(value)
+    raise Fallback()
+dataclass_loaders: Dict[type, DataclassLoader] = {}
+# Reentrant, as the loader of a class creates the loaders of its nested dataclasses
+dataclass_loaders_lock = threading.RLock()
+def get_dataclass_loader(cls: type) -> DataclassLoader:
+    """Returns the compiled loader of the dataclass, creating it on first use."""
+    loader = dataclass_loaders.get(cls)
+    if loader is None:
+        with dataclass_loaders_lock:
+            loader = dataclass_loaders.get(cls)
+            if loader is None:
+                loader = DataclassLoader(cls)
+                dataclass_loaders[cls] = loader
+    return loader
+def load_dataclass(cls: type, data: dict):
+    """Fast equivalent of cls.from_dict(data)."""
+    return get_dataclass_loader(cls).load(data)
+def dump_dataclass(obj) -> dict:
+    """Fast equivalent of obj.to_dict()."""
+    return get_dataclass_loader(type(obj)).dump(obj)
@@ -1,6 +1,18 @@
+import atexit
+import queue
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional
 from ..stream.kafka import KafkaConnector
-from ..config_loader import get_config
+from ..config_loader import get_config, get_numeric_config
+from ..exceptions.exception_handler import DataMeshExceptionHandler
 from ..utils import logger
+DEFAULT_EMAIL_DIGEST_WINDOW_SEC = 30
+DEFAULT_EMAIL_QUEUE_SIZE = 10000
+DIGEST_SEPARATOR = "<br><hr><br>"
+email_notification_buffer = None
+email_notification_buffer_lock = threading.Lock()
 def send_email_notification(data):
     """
     This function acts as a wrapper for email notifications.
@@ -17,9 +29,137 @@ def send_email_notification(data):
                 ",
     }
     """
-    logger.debug(f"Sending email notification: {data}")
+    logger.debug(lambda: f"Sending email notification: {data}")
     KafkaConnector.send_message(
         get_config("ALBANERO_KAFKA_TOPIC_EMAIL_NOTIFICATION"), data
     )
 Uncovered code
-    logger.info("Email notification sent successfully.")
\ No newline at end of file
+    logger.info("Email notification sent successfully.")
+def queue_email_notification(data):
+    """
+    Queues an email notification to be sent in a digest, see EmailNotificationBuffer.
+    Use it instead of send_email_notification for bulk events, e.g. mass question status changes.
+    """
+    global email_notification_buffer
+    if email_notification_buffer is None:
+        with email_notification_buffer_lock:
+            if email_notification_buffer is None:
+                email_notification_buffer = EmailNotificationBuffer()
+    email_notification_buffer.add(data)
+def get_digest_group_key(data: dict) -> tuple:
+    """Returns the key of the digest of a notification, its template or else its subject."""
+    if data.get("template"):
+        return ("template", data["template"])
+    return ("subject", data.get("subject"))
+def build_digest(messages: list) -> dict:
+    """
+    Merges the messages of one recipient and one template, or one subject, into a single email.
+    The html bodies are concatenated in the order they were queued. Template messages are rendered once,
+    with the data of every message as a list in data["items"]. The other fields are taken from the first message.
+    """
+    if len(messages) == 1:
+        return messages[0]
+    digest = dict(messages[0])
+    subjects = list(OrderedDict.fromkeys(message.get("subject") for message in messages))
+    if len(subjects) == 1 and subjects[0] is not None:
+        digest["subject"] = f"{subjects[0]} ({len(messages)} updates)"
+    elif subjects[0] is not None:
+        digest["subject"] = f"{subjects[0]} (+{len(messages) - 1} more updates)"
+    if digest.get("template"):
+        digest["data"] = {"items": [message.get("data") for message in messages]}
+    else:
+        digest["html"] = DIGEST_SEPARATOR.join(
+            message.get("html", "") for message in messages
+        )
+    return digest
+class EmailNotificationBuffer:
+    """
+    Groups email notifications by recipient and template, or subject, within a time window and sends one digest
+    per group, see build_digest.
+    Notifications are queued on a bounded queue and published by a background thread without blocking the caller.
+    When the queue is full the notification is sent right away, so that no email is dropped.
+    Args:
+        window_sec (float, optional): Time window in which notifications are grouped.
+            Defaults to the ALBANERO_EMAIL_DIGEST_WINDOW_SEC config, or 30 seconds.
+        max_queue_size (int, optional): Maximum number of queued notifications.
+    """
+    def __init__(
+        self,
+        window_sec: Optional[float] = None,
+        max_queue_size: int = DEFAULT_EMAIL_QUEUE_SIZE,
+    ):
+        self.window_sec = window_sec or get_numeric_config(
+            "ALBANERO_EMAIL_DIGEST_WINDOW_SEC", DEFAULT_EMAIL_DIGEST_WINDOW_SEC
+        )
+        self.notifications = queue.Queue(maxsize=max_queue_size)
+        # recipient -> (template or subject) -> messages, in the order they were queued
+        self.groups = OrderedDict()
+        self.window_started_at = None
+        self.closed = False
+        self.topic = get_config("ALBANERO_KAFKA_TOPIC_EMAIL_NOTIFICATION")
+        # The producer is created first, so that its shutdown hook runs after this buffer is closed
+        KafkaConnector.get_producer(self.topic)
+        self.worker = threading.Thread(
+            target=self.run, name="email-notification-buffer", daemon=True
+        )
+        self.worker.start()
+        atexit.register(self.close)
+    def add(self, data: dict) -> None:
+        if self.closed:
+            send_email_notification(data)
+            return
+        try:
+            self.notifications.put_nowait(data)
+        except queue.Full:
+            logger.warning("Email notification queue is full, sending the notification right away.")
+            send_email_notification(data)
+    def run(self) -> None:
+        while True:
+            timeout = None
+            if self.window_started_at is not None:
+                timeout = max(self.window_started_at + self.window_sec - monotonic(), 0)
+            try:
+                data = self.notifications.get(timeout=timeout)
+            except queue.Empty:
+                self.flush()
+                continue
+            if data is None:
+                self.flush()
+                return
+            self.group(data)
+    def group(self, data: dict) -> None:
+        recipient = data.get("to")
+        if isinstance(recipient, list):
+            recipient = tuple(recipient)
+        group_key = get_digest_group_key(data)
+        self.groups.setdefault(recipient, OrderedDict()).setdefault(
+            group_key, []
+        ).append(data)
+        if self.window_started_at is None:
+            self.window_started_at = monotonic()
+    def flush(self) -> None:
+        groups, self.groups = self.groups, OrderedDict()
+        self.window_started_at = None
+        digest_count = 0
+        for recipient_groups in groups.values():
+            for messages in recipient_groups.values():
+                digest = build_digest(messages)
+                digest_count += 1
+                try:
+                    KafkaConnector.send_message(self.topic, digest, block=False)
+                except Exception as e:
+                    message = DataMeshExceptionHandler.parse_message(e)
+                    logger.error(
+                        f"Failed to send the email digest to {digest.get('to')}: {message}"
+                    )
+        if groups:
+            logger.debug(
+                f"{digest_count} email digest(s) sent to {len(groups)} recipient(s)."
+            )
+    def close(self) -> None:
+        """Sends the queued notifications and stops the background thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.notifications.put(None)
+        self.worker.join()
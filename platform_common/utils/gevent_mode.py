@@ -0,0 +1,46 @@
+import sys
+from ..exceptions.custom_exceptions import GeventConfigurationException
+from . import logger
+# Modules that must be patched for requests, pymongo, boto3 and kafka-python to yield cooperatively
+REQUIRED_PATCHED_MODULES = ["socket", "ssl", "select", "threading", "time", "queue"]
+gevent_mode_enabled = False
+def is_gevent_mode_enabled() -> bool:
+    return gevent_mode_enabled
+def enable_gevent_mode() -> None:
+    """
+    Verifies that gevent monkey-patching was applied before the blocking libraries were imported
+    and switches the fan-out helpers from thread pools to bounded greenlet pools.
+    Services should call gevent.monkey.patch_all() before importing platform_common, and set
+    ALBANERO_GEVENT_MODE=true to have this check run when the library is imported.
+    Raises:
+        GeventConfigurationException: gevent is missing, a required module is not patched,
+            or a module captured the unpatched ssl.SSLContext because it was imported before patching.
+    """
+    global gevent_mode_enabled
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise GeventConfigurationException("gevent is not installed.")
+    unpatched_modules = [
+        module_name
+        for module_name in REQUIRED_PATCHED_MODULES
+        if not monkey.is_module_patched(module_name)
+    ]
+    if unpatched_modules:
+        raise GeventConfigurationException(
+            f"modules {unpatched_modules} are not monkey-patched, call gevent.monkey.patch_all() before importing platform_common."
+        )
+    original_ssl_context = monkey.get_original("ssl", "SSLContext")
+    early_imports = [
+        module_name
+        for module_name, module in list(sys.modules.items())
+        if module is not None
+        and not module_name.startswith(("gevent", "ssl", "_ssl"))
+        and getattr(module, "__dict__", {}).get("SSLContext") is original_ssl_context
+    ]
+    if early_imports:
+        raise GeventConfigurationException(
+            f"modules {early_imports} were imported before monkey-patching and hold the blocking ssl.SSLContext."
+        )
+    gevent_mode_enabled = True
+    logger.info("Gevent mode is enabled.")
@@ -1,7 +1,9 @@
-from copy import deepcopy
+from copy import copy
+from functools import lru_cache
 from time import time
 import re
 from uuid import uuid4
+from typing import List, Optional
 from ..dataclasses import (
     S3Table,
     DeltaLakeTable,
@@ -12,11 +14,25 @@ from ..dataclasses import (
     OracleTable,
 )
 from ..enums import SourceTargetTypes
-from ..config_loader import get_config
+from ..config_loader import get_config_or_default, get_numeric_config
+from ..exceptions.exception_handler import CORS_ALLOW_HEADERS, CORS_ALLOW_METHODS
+from ..configs.catalog_index import baan_catalog_index, ln_catalog_index
 from platform_common.stream.kafka import KafkaConnector, ExistingKafkaConnection
 from platform_common.storage.mongo import MongoDBConnector
 from . import logger
-from flask import Request as FlaskRequest, jsonify
+from .dataclass_loaders import load_dataclass
+from flask import Request as FlaskRequest, jsonify, request
+DEFAULT_CORS_MAX_AGE_SEC = 600
+DOLLAR_DOT_KEY_CACHE_SIZE = 4096
+# Mapping of source types to their corresponding table classes
+SOURCE_TYPE_TABLE_MAP = {
+    SourceTargetTypes.S3: S3Table,
+    SourceTargetTypes.DELTALAKE: DeltaLakeTable,
+    SourceTargetTypes.IBM_DB2: IbmDb2Table,
+    SourceTargetTypes.SNOWFLAKE: SnowflakeTable,
+    SourceTargetTypes.MS_SQL: MSSQLTable,
+    SourceTargetTypes.ORACLE: OracleTable,
+}
 class RawURLMiddleware:
     def __init__(self, app):
         self.app = app
@@ -24,6 +40,81 @@ class RawURLMiddleware:
         raw_path = environ.get("RAW_URI", None)
         environ["RAW_REQUEST_URI"] = raw_path
         return self.app(environ, start_response)
+class CorsPreflightMiddleware:
+    """
+    WSGI middleware that answers CORS preflight requests before they reach the Flask app,
+    so that no authentication or authorization hook runs for them.
+    The response headers are built once per allowed origin when the middleware is created.
+    Usage:
+        app.wsgi_app = CorsPreflightMiddleware(app.wsgi_app)
+    Args:
+        app: The WSGI app to wrap.
+        allowed_origins (list, optional): Origins allowed to call the service, "*" allows any origin.
+            Defaults to the comma separated ALBANERO_CORS_ALLOWED_ORIGINS config, or "*".
+        max_age (int, optional): Seconds for which browsers may cache the preflight response.
+            Defaults to the ALBANERO_CORS_MAX_AGE_SEC config.
+    """
+    def __init__(
+        self,
+        app,
+        allowed_origins: Optional[List[str]] = None,
+        max_age: Optional[int] = None,
+    ):
+        self.app = app
+        if allowed_origins is None:
+            allowed_origins = get_config_or_default("ALBANERO_CORS_ALLOWED_ORIGINS", "*")
+        if isinstance(allowed_origins, str):
+            allowed_origins = allowed_origins.split(",")
+        allowed_origins = [origin.strip() for origin in allowed_origins if origin.strip()]
+        if max_age is None:
+            max_age = get_numeric_config(
+                "ALBANERO_CORS_MAX_AGE_SEC", DEFAULT_CORS_MAX_AGE_SEC, int
+            )
+        common_headers = [
+            ("Access-Control-Allow-Headers", CORS_ALLOW_HEADERS),
+            ("Access-Control-Allow-Methods", CORS_ALLOW_METHODS),
+            ("Access-Control-Allow-Credentials", "true"),
+            ("Access-Control-Max-Age", str(max_age)),
+            ("Content-Length", "0"),
+        ]
+        self.any_origin_headers = None
+        if "*" in allowed_origins:
+            self.any_origin_headers = [
+                ("Access-Control-Allow-Origin", "*")
+            ] + common_headers
+        self.origin_headers = {
+            origin: [("Access-Control-Allow-Origin", origin), ("Vary", "Origin")]
+            + common_headers
+            for origin in allowed_origins
+            if origin != "*"
+        }
+    def __call__(self, environ, start_response):
+        if (
+            environ.get("REQUEST_METHOD") != "OPTIONS"
+            or "HTTP_ACCESS_CONTROL_REQUEST_METHOD" not in environ
+        ):
+            return self.app(environ, start_response)
+        headers = self.origin_headers.get(
+            environ.get("HTTP_ORIGIN"), self.any_origin_headers
+        )
+        if headers is None:
+            start_response("403 Forbidden", [("Content-Length", "0")])
+            return [b""]
+        start_response("200 OK", list(headers))
+        return [b""]
+def bind_request_log_context():
+    """
+    Sets the log context of the request from its X-Request-Id, X-Org-Id and X-Project-Id headers.
+    A request id is generated when the header is missing.
+    Usage:
+        app.before_request(bind_request_log_context)
+    """
+    logger.set_log_context(
+        replace=True,
+        request_id=request.headers.get("X-Request-Id") or uuid4_str(),
+        org_id=request.headers.get("X-Org-Id"),
+        project_id=request.headers.get("X-Project-Id"),
+    )
 class CustomRequest(FlaskRequest):
     @property
     def raw_url(self):
@@ -45,16 +136,27 @@ def append_before_format(file_path: str, *append_strings: str) -> str:
     path = ".".join(str_list[:-1])
     return f"{path}_{append_str}.{file_format}"
 def health_check(check_options: dict = None):
+    """
+    Returns the health of the service.
+    check_options:
+        kafka (bool): Connects to Kafka.
+        mongo (bool): Connects to MongoDB.
+        kafka_metrics (bool): Adds the producer buffer utilization and the consumer lag by partition.
+    """
     if not check_options:
         check_options = {}
+    health = {"status": "healthy"}
     try:
         if check_options.get("kafka"):
-            KafkaConnector()
+            try:
+                KafkaConnector()
+            except ExistingKafkaConnection:
+                pass
         if check_options.get("mongo"):
             MongoDBConnector.get_instance()
-        return jsonify({"status": "healthy"}), 200
-    except ExistingKafkaConnection:
-        return jsonify({"status": "healthy"}), 200
+        if check_options.get("kafka_metrics"):
+            health["kafka"] = KafkaConnector.get_health()
+        return jsonify(health), 200
     except Exception as e:
         logger.error(f"Error in health check: {str(e)}")
         return jsonify({"status": "unhealthy", "message": str(e)}), 500
@@ -70,20 +172,20 @@ def file_name_split_with_target(file_path: str, target_path=None) -> str:
     return f"{target_table_name}"
 def create_table_instance(details: dict) -> TableDetails:
     source_type = details.get("sourceType")
-    # Mapping of source types to their corresponding from_dict methods
-    source_type_map = {
-        SourceTargetTypes.S3: S3Table,
-        SourceTargetTypes.DELTALAKE: DeltaLakeTable,
-        SourceTargetTypes.IBM_DB2: IbmDb2Table,
-        SourceTargetTypes.SNOWFLAKE: SnowflakeTable,
-        SourceTargetTypes.MS_SQL: MSSQLTable,
-        SourceTargetTypes.ORACLE: OracleTable,
-    }
-    table_class = source_type_map.get(source_type)
+    table_class = SOURCE_TYPE_TABLE_MAP.get(source_type)
     if table_class:
-        return table_class.from_dict(details)
+        return load_dataclass(table_class, details)
     else:
         raise ValueError(f"Unknown source type: {source_type}")
+def create_table_instances(details_list: List[dict]) -> List[TableDetails]:
+    """
+    Creates the table instances of many table details, e.g. the tables of a multi-table job.
+    Args:
+        details_list (list): Table details, each with its sourceType.
+    Returns:
+        list: Table instances, in the order of details_list.
+    """
+    return [create_table_instance(details) for details in details_list]
 New code
 def get_ln_metadata_columns(table_name: str, send_with_datatype: bool = False):
     """
@@ -94,20 +196,17 @@ def get_ln_metadata_columns(table_name: str, send_with_datatype: bool = False):
         List : Returns list of columns names if meta data found or a empty list.
     """
     table_name = table_name.lower()
-    mongo_client = MongoDBConnector.get_instance()
-    db = mongo_client[get_config("DB_NAME_LN_METADATA")]
-    collection = db[get_config("COL_NAME_LN_TABLE_METADATA")]
-    result = collection.find_one({"tableName": table_name}, {"_id": 0})
-    if result and result.get("columns"):
+    columns = ln_catalog_index.get_columns(table_name)
+    if columns:
         if send_with_datatype:
             column_meta_dict = {}
-            for column_info in result["columns"]:
+            for column_info in columns:
                 column_name = column_info["columnName"][-4:].upper()
                 column_meta_dict[column_name] = column_info["datatype"]
             return column_meta_dict
         else:
             column_list = []
-            for column_data in result["columns"]:
+            for column_data in columns:
                 col_name = column_data["columnName"][-4:].upper()
                 column_list.append(col_name)
             return column_list
@@ -119,24 +218,63 @@ def get_baan_metadata_columns(table_name: str, send_with_datatype: bool = False)
     Returns:
         List : Returns list of columns names if meta data found or a empty list.
     """
-    mongo_client = MongoDBConnector.get_instance()
-    db = mongo_client[get_config("DB_NAME_LN_METADATA")]
-    collection = db[get_config("COL_NAME_BAAN_TABLE_METADATA")]
-    result = collection.find_one({"tableName": table_name.lower()}, {"_id": 0})
-    if result and result.get("columns"):
+    columns = baan_catalog_index.get_columns(table_name.lower())
+    if columns:
         if send_with_datatype:
             column_meta_dict = {}
-            for column_info in result["columns"]:
+            for column_info in columns:
                 column_name = column_info["columnDbName"].upper()
                 column_meta_dict[column_name] = column_info["datatype"]
             return column_meta_dict
         else:
             column_list = []
-            for column_data in result["columns"]:
+            for column_data in columns:
                 col_name = column_data["columnDbName"].upper()
                 column_list.append(col_name)
             return column_list
-def replace_dollar_dot(obj, invert=False):
+@lru_cache(maxsize=DOLLAR_DOT_KEY_CACHE_SIZE)
+def translate_dollar_dot_key(key, invert=False):
+    """Translates a single key for replace_dollar_dot, cached as documents repeat the same key names."""
+    update_key = key
+    if invert:
+        if "__dollar__" in key:
+            update_key = update_key.replace("__dollar__", "$")
+        if "__dot__" in key:
+            update_key = update_key.replace("__dot__", ".")
+    else:
+        if "$" in key:
+            update_key = update_key.replace("$", "__dollar__")
+        if "." in key:
+            update_key = update_key.replace(".", "__dot__")
+    return update_key
+def empty_container(obj):
+    if isinstance(obj, list):
+        return []
+    if type(obj) is dict:
+        return {}
+    # Keeps the dict subclass and its state, e.g. the default_factory of a defaultdict
+    container = copy(obj)
+    container.clear()
+    return container
+def has_key_collision(obj: dict, update_keys: list) -> bool:
+    """Returns True if a translated key replaces another key of the dict."""
+    changed_keys = set()
+    for key, update_key in zip(obj, update_keys):
+        if update_key != key:
+            if update_key in obj or update_key in changed_keys:
+                return True
+            changed_keys.add(update_key)
+    return False
+def replace_keys_in_order(target: dict, items: list, update_keys: list, convert) -> None:
+    """
+    Pops every key and sets it again under its translated key, in the original order,
+    which is how colliding keys have always been resolved.
+    """
+    for (key, value), update_key in zip(items, update_keys):
+        target[update_key] = target.pop(key)
+        if isinstance(value, (dict, list)):
+            target[update_key] = convert(value)
+def replace_dollar_dot(obj, invert=False, in_place=False):
     """Provides bidirectional conversion of dictionary keys
         to make it compatible with MongoDB
     Args:
@@ -149,29 +287,56 @@ def replace_dollar_dot(obj, invert=False):
                 e.g. dot[.] is replaced by __dot__
                     dollar[$] is replaced by __dollar__
             Defaults to False.
+        in_place (bool, optional): If True, the dicts and lists of obj are converted in place
+            instead of building new ones. Defaults to False.
     Returns:
-        obj : Converted object
+        obj : Converted object. New dicts and lists are built, the other values are shared with obj.
     """
-    update_obj = deepcopy(obj)
-    if isinstance(obj, list):
-        update_obj = []
-        for items in obj:
-            update_obj.append(replace_dollar_dot(items, invert))
-    elif isinstance(obj, dict):
-        for key, value in obj.items():
-            update_key = key
-            if invert:
-                if "__dollar__" in key:
-                    update_key = update_key.replace("__dollar__", "$")
-                if "__dot__" in key:
-                    update_key = update_key.replace("__dot__", ".")
-            else:
-                if "$" in key:
-                    update_key = update_key.replace("$", "__dollar__")
-                if "." in key:
-                    update_key = update_key.replace(".", "__dot__")
-            update_obj[update_key] = update_obj.pop(key)
-            if isinstance(value, (dict, list)):
-                update_obj[update_key] = replace_dollar_dot(value, invert)
-Uncovered code
-    return update_obj
\ No newline at end of file
+    if not isinstance(obj, (dict, list)):
+        return obj
+    if in_place:
+        replace_dollar_dot_in_place(obj, invert)
+        return obj
+    # Containers are converted iteratively, each new container is created empty and filled when popped
+    pending = []
+    def convert(value):
+        container = empty_container(value)
+        pending.append((value, container))
+        return container
+    result = convert(obj)
+    while pending:
+        source, target = pending.pop()
+        if isinstance(source, list):
+            for item in source:
+                target.append(convert(item) if isinstance(item, (dict, list)) else item)
+            continue
+        update_keys = [translate_dollar_dot_key(key, invert) for key in source]
+        if has_key_collision(source, update_keys):
+            target.update(source)
+            replace_keys_in_order(target, list(source.items()), update_keys, convert)
+            continue
+        for value, update_key in zip(source.values(), update_keys):
+            target[update_key] = (
+                convert(value) if isinstance(value, (dict, list)) else value
+            )
+    return result
+def replace_dollar_dot_in_place(obj, invert=False) -> None:
+    # Shared dicts and lists are converted once, as converting a key twice may change it again
+    visited = set()
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in visited:
+            continue
+        visited.add(id(current))
+        if isinstance(current, list):
+            pending.extend(item for item in current if isinstance(item, (dict, list)))
+            continue
+        items = list(current.items())
+        update_keys = [translate_dollar_dot_key(key, invert) for key, _ in items]
+        if has_key_collision(current, update_keys):
+            replace_keys_in_order(current, items, update_keys, lambda value: value)
+        elif any(update_key != key for (key, _), update_key in zip(items, update_keys)):
+            current.clear()
+            current.update(zip(update_keys, (value for _, value in items)))
+        pending.extend(value for _, value in items if isinstance(value, (dict, list)))
@@ -1,46 +1,414 @@
+import atexit
+import contextvars
+import copy
+import gzip
+import json
 import os
 import logging
+import logging.handlers
+import queue
+import shutil
 import sys
-def setup_logger(log_level=logging.INFO):
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+LOG_FORMAT = "%(asctime)s - %(name)s - [%(levelname)s] - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+DROP_POLICIES = {DROP_NEWEST, DROP_OLDEST, BLOCK}
+DEFAULT_LOG_QUEUE_SIZE = 10000
+DEFAULT_LOG_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 10
+DEFAULT_LOG_ROTATE_INTERVAL_SEC = 24 * 60 * 60
+DEFAULT_LOG_RATE_LIMIT_INTERVAL_SEC = 60
+# Record attribute and JSON field of every log context field
+LOG_CONTEXT_FIELDS = {
+    "job_id": "jobId",
+    "request_id": "requestId",
+    "org_id": "orgId",
+    "project_id": "projectId",
+}
+queue_handler = None
+queue_listener = None
+# Handlers that setup_logger attached to the root logger
+root_handlers = []
+structured_logging = False
+# Set when a rate limit or sampling filter is installed, as they key records by call site
+track_call_sites = False
+# The context is replaced and never mutated, so that copies taken for other threads or greenlets stay intact
+log_context_var = contextvars.ContextVar("log_context", default={})
+def get_log_context() -> dict:
+    return log_context_var.get()
+def set_log_context(replace: bool = False, **fields) -> contextvars.Token:
+    """
+    Sets job_id, request_id, org_id or project_id on every record logged in the current context,
+    i.e. the current request, thread or greenlet. Fields set to None are removed.
+    Args:
+        replace (bool, optional): If True, the fields that are not given are cleared.
+    Returns:
+        Token: Restores the previous context when passed to reset_log_context.
+    """
+    unknown_fields = set(fields) - set(LOG_CONTEXT_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Unsupported log context fields: {sorted(unknown_fields)}")
+    context = {} if replace else dict(log_context_var.get())
+    context.update(fields)
+    return log_context_var.set(
+        {field: value for field, value in context.items() if value is not None}
+    )
+def reset_log_context(token: contextvars.Token) -> None:
+    log_context_var.reset(token)
+@contextmanager
+def log_context(**fields):
+    """
+    Sets the log context fields for the duration of the block.
+    Usage:
+        with logger.log_context(job_id=job_id):
+            run_job()
+    """
+    token = set_log_context(**fields)
+    try:
+        yield
+    finally:
+        reset_log_context(token)
+class LogContextFilter(logging.Filter):
+    """Copies the log context onto the record, on the thread that logs it."""
+    def filter(self, record) -> bool:
+        context = log_context_var.get()
+        for field in LOG_CONTEXT_FIELDS:
+            if getattr(record, field, None) is None:
+                setattr(record, field, context.get(field))
+        return True
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines with the log context fields."""
+    def format(self, record) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field, json_field in LOG_CONTEXT_FIELDS.items():
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[json_field] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+def get_call_site(record) -> tuple:
+    return getattr(record, "call_site", None) or (record.pathname, record.lineno)
+class CallSiteFilter(logging.Filter):
+    """
+    Base class of the filters that count records per call site.
+    The decision is stored on the record, as the same record is filtered by every handler of the root logger.
+    """
+    decision_attribute = None
+    def filter(self, record) -> bool:
+        decision = getattr(record, self.decision_attribute, None)
+        if decision is None:
+            decision = self.decide(record)
+            setattr(record, self.decision_attribute, decision)
+        return decision
+    def decide(self, record) -> bool:
+        raise NotImplementedError
+class RateLimitFilter(CallSiteFilter):
+    """
+    Lets at most max_records records of each call site and level through per interval_sec.
+    Records with a traceback are also counted per exception type, so one error never hides another.
+    The first record of the next interval reports how many records were suppressed.
+    """
+    decision_attribute = "rate_limited"
+    def __init__(self, max_records: int, interval_sec: float = DEFAULT_LOG_RATE_LIMIT_INTERVAL_SEC):
+        super().__init__()
+        self.max_records = max_records
+        self.interval_sec = interval_sec
+        # (call site, level, exception type) -> [interval start, records in the interval]
+        self.intervals = {}
+        self.lock = threading.Lock()
+    def decide(self, record) -> bool:
+        error_type = type(record.exc_info[1]) if record.exc_info else None
+        key = (get_call_site(record), record.levelno, error_type)
+        now = time.monotonic()
+        with self.lock:
+            interval = self.intervals.get(key)
+            if interval is not None and now - interval[0] < self.interval_sec:
+                interval[1] += 1
+                return interval[1] <= self.max_records
+            suppressed_count = max(interval[1] - self.max_records, 0) if interval else 0
+            self.intervals[key] = [now, 1]
+        if suppressed_count and isinstance(record.msg, str):
+            record.msg = f"{record.msg} ({suppressed_count} similar records were suppressed)"
+        return True
+class SamplingFilter(CallSiteFilter):
+    """
+    Lets one in every round(1 / sample_rate) records of each call site through, for records up to max_level.
+    Records above max_level, e.g. warnings and errors, are never sampled.
+    """
+    decision_attribute = "sampled"
+    def __init__(self, sample_rate: float, max_level: int = logging.INFO):
+        super().__init__()
+        self.sample_every = max(round(1 / sample_rate), 1)
+        self.max_level = max_level
+        self.counts = {}
+        self.lock = threading.Lock()
+    def decide(self, record) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = (get_call_site(record), record.levelno)
+        with self.lock:
+            count = self.counts.get(key, 0)
+            self.counts[key] = count + 1
+        return count % self.sample_every == 0
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    A file handler that rolls the log over when it reaches max_bytes or when rotate_interval_sec has passed,
+    whichever comes first. Rolled over files are gzip compressed, e.g. app.log.1.gz.
+    """
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+        rotate_interval_sec: float = DEFAULT_LOG_ROTATE_INTERVAL_SEC,
+    ):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count)
+        self.rotate_interval_sec = rotate_interval_sec
+        self.rollover_at = time.time() + rotate_interval_sec
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = compress_log_file
+    def shouldRollover(self, record) -> bool:
+        if self.rotate_interval_sec and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = time.time() + self.rotate_interval_sec
+def compress_log_file(source: str, dest: str) -> None:
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts log records on a bounded queue, from which a QueueListener formats and writes them on a background thread.
+    When the queue is full, drop_policy decides whether the new record is dropped (drop_newest),
+    the oldest queued record is dropped (drop_oldest), or the caller waits for space (block).
+    """
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = DROP_NEWEST):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unsupported log drop policy '{drop_policy}', expected one of {sorted(DROP_POLICIES)}"
+            )
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self.dropped_count = 0
+        self.dropped_count_lock = threading.Lock()
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, the record is not formatted here and exc_info is kept,
+        # so that the traceback is formatted by the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    def enqueue(self, record) -> None:
+        if self.drop_policy == BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        with self.dropped_count_lock:
+            self.dropped_count += 1
+class BlockingSentinelQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full, so wait for space instead of raising queue.Full
+        self.queue.put(self._sentinel)
+def is_queue_mode_enabled() -> bool:
+    return os.environ.get("ALBANERO_LOG_QUEUE_MODE", "").lower() in ("1", "true", "yes")
+def setup_logger(
+    log_level=logging.INFO,
+    queue_mode: bool = None,
+    max_queue_size: int = None,
+    drop_policy: str = None,
+    max_bytes: int = None,
+    backup_count: int = None,
+    rotate_interval_sec: float = None,
+    structured: bool = None,
+    rate_limit: int = None,
+    rate_limit_interval_sec: float = None,
+    sample_rate: float = None,
+):
+    """
+    Configures the root logger to write to logs/app.log and to stdout.
+    Without queue mode, a root logger that already has handlers is left as it is. Queue mode replaces the
+    handlers of a previous call, e.g. the one made when platform_common is imported.
+    In queue mode, log calls only put the record on a bounded queue. Formatting and I/O happen on a background
+    thread, and the log file is rotated by size and time and compressed. Every option defaults to an
+    environment variable, as the logger is set up before the configs are loaded:
+        queue_mode: ALBANERO_LOG_QUEUE_MODE
+        max_queue_size: ALBANERO_LOG_QUEUE_SIZE, defaults to 10000.
+        drop_policy: ALBANERO_LOG_DROP_POLICY, one of drop_newest, drop_oldest or block. Defaults to drop_newest.
+        max_bytes: ALBANERO_LOG_MAX_BYTES, defaults to 100 MB.
+        backup_count: ALBANERO_LOG_BACKUP_COUNT, defaults to 10.
+        rotate_interval_sec: ALBANERO_LOG_ROTATE_INTERVAL_SEC, defaults to one day.
+    Structured logging writes JSON lines with the fields of the log context, see set_log_context.
+    Rate limiting and sampling apply per call site, to keep repetitive hot path records affordable:
+        structured: ALBANERO_LOG_FORMAT=json
+        rate_limit: ALBANERO_LOG_RATE_LIMIT, records per call site and level per interval. Disabled by default.
+        rate_limit_interval_sec: ALBANERO_LOG_RATE_LIMIT_INTERVAL_SEC, defaults to 60.
+        sample_rate: ALBANERO_LOG_SAMPLE_RATE, fraction of the debug and info records that are kept. Defaults to 1.
+    """
+    global queue_handler, queue_listener, root_handlers, structured_logging, track_call_sites
     dir_path = "logs"
     os.makedirs(dir_path, exist_ok=True)
     filename = f"{dir_path}/app.log"
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - [%(levelname)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[
-            logging.FileHandler(filename),
-            logging.StreamHandler(sys.stdout),
-        ],
-    )
-def debug(message: str, job_id: str = None) -> None:
-    if job_id:
-        logging.debug(f"[{job_id}] - {message}")
-    else:
-        logging.debug(message)
-def info(message: str, job_id: str = None) -> None:
-    if job_id:
-        logging.info(f"[{job_id}] - {message}")
-    else:
-        logging.info(message)
-def warning(message: str, job_id: str = None) -> None:
-    if job_id:
-        logging.warning(f"[{job_id}] - {message}")
-    else:
-        logging.warning(message)
-def error(message: str, job_id: str = None) -> None:
-    if job_id:
-        logging.error(f"[{job_id}] - {message}")
-    else:
-        logging.error(message)
-def critical(message: str, job_id: str = None) -> None:
-    if job_id:
-        logging.critical(f"[{job_id}] - {message}")
+    environ = os.environ
+    if queue_mode is None:
+        queue_mode = is_queue_mode_enabled()
+    if structured is None:
+        structured = environ.get("ALBANERO_LOG_FORMAT", "").lower() == "json"
+    rate_limit = rate_limit or int(environ.get("ALBANERO_LOG_RATE_LIMIT", 0))
+    rate_limit_interval_sec = rate_limit_interval_sec or float(
+        environ.get(
+            "ALBANERO_LOG_RATE_LIMIT_INTERVAL_SEC", DEFAULT_LOG_RATE_LIMIT_INTERVAL_SEC
+        )
+    )
+    sample_rate = sample_rate or float(environ.get("ALBANERO_LOG_SAMPLE_RATE", 1))
+    # Filters run on the handlers attached to the root logger, on the thread that logs the record
+    log_filters = [LogContextFilter()]
+    if sample_rate < 1:
+        log_filters.append(SamplingFilter(sample_rate))
+    if rate_limit:
+        log_filters.append(RateLimitFilter(rate_limit, rate_limit_interval_sec))
+    if structured:
+        formatter = JsonFormatter()
     else:
-        logging.critical(message)
-def exception(message: str, job_id: str = None) -> None:
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    if not queue_mode:
+        if logging.root.handlers:
+            return
+        handlers = [logging.FileHandler(filename), logging.StreamHandler(sys.stdout)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            add_filters(handler, log_filters)
+        logging.basicConfig(level=log_level, handlers=handlers)
+        root_handlers = handlers
+        structured_logging = structured
+        track_call_sites = len(log_filters) > 1
+        return
+    if queue_listener is not None:
+        return
+    max_queue_size = max_queue_size or int(
+        environ.get("ALBANERO_LOG_QUEUE_SIZE", DEFAULT_LOG_QUEUE_SIZE)
+    )
+    drop_policy = drop_policy or environ.get("ALBANERO_LOG_DROP_POLICY", DROP_NEWEST)
+    max_bytes = max_bytes or int(
+        environ.get("ALBANERO_LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES)
+    )
+    backup_count = backup_count or int(
+        environ.get("ALBANERO_LOG_BACKUP_COUNT", DEFAULT_LOG_BACKUP_COUNT)
+    )
+    rotate_interval_sec = rotate_interval_sec or float(
+        environ.get("ALBANERO_LOG_ROTATE_INTERVAL_SEC", DEFAULT_LOG_ROTATE_INTERVAL_SEC)
+    )
+    file_handler = CompressedRotatingFileHandler(
+        filename, max_bytes, backup_count, rotate_interval_sec
+    )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+    log_queue = queue.Queue(maxsize=max_queue_size)
+    queue_handler = BoundedQueueHandler(log_queue, drop_policy)
+    add_filters(queue_handler, log_filters)
+    queue_listener = BlockingSentinelQueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    queue_listener.start()
+    atexit.register(stop_queue_listener)
+    # basicConfig does nothing once the root logger has handlers, so the handlers are swapped explicitly
+    root_logger = logging.getLogger()
+    for handler in root_handlers:
+        root_logger.removeHandler(handler)
+        handler.close()
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(log_level)
+    root_handlers = [queue_handler]
+    structured_logging = structured
+    track_call_sites = len(log_filters) > 1
+def add_filters(handler: logging.Handler, log_filters: list) -> None:
+    for log_filter in log_filters:
+        handler.addFilter(log_filter)
+def stop_queue_listener() -> None:
+    """Writes the queued records and stops the background logging thread."""
+    global queue_listener, root_handlers
+    if queue_listener is None:
+        return
+    queue_listener.stop()
+    # Records logged later in the interpreter shutdown are written synchronously
+    root_logger = logging.getLogger()
+    root_logger.removeHandler(queue_handler)
+    for handler in queue_listener.handlers:
+        add_filters(handler, queue_handler.filters)
+        root_logger.addHandler(handler)
+    root_handlers = list(queue_listener.handlers)
+    queue_listener = None
+    if queue_handler.dropped_count:
+        sys.stderr.write(
+            f"{queue_handler.dropped_count} log record(s) were dropped because the log queue was full.\n"
+        )
+def log(
+    level: int, message, job_id: str = None, *args, stack_depth: int = 1, **kwargs
+) -> None:
+    """
+    Logs the message on the root logger if the level is enabled.
+    The message is only built when the record is logged: it may be a callable that returns the message,
+    or a %-style format string with args, so that large values are not formatted at disabled levels.
+    job_id is prefixed to the message, or written to the jobId field in structured logging.
+    Usage:
+        logger.debug(lambda: f"Delimiters obtained from database: {result}", job_id)
+        logger.debug("Delimiters obtained from database: %s", job_id, result)
+    """
+    if not logging.root.isEnabledFor(level):
+        return
+    if callable(message):
+        message = message()
+    extra = {}
     if job_id:
-        logging.exception(f"[{job_id}] - {message}")
-    else:
-        logging.exception(message)
+        if structured_logging:
+            extra["job_id"] = job_id
+        else:
+            message = f"[{job_id}] - {message}"
+    if track_call_sites:
+        # Records are logged through this module, so the caller's frame identifies the call site
+        caller = sys._getframe(stack_depth)
+        extra["call_site"] = (caller.f_code.co_filename, caller.f_lineno)
+    logging.log(level, message, *args, extra=extra, **kwargs)
+def debug(message, job_id: str = None, *args) -> None:
+    log(logging.DEBUG, message, job_id, *args, stack_depth=2)
+def info(message, job_id: str = None, *args) -> None:
+    log(logging.INFO, message, job_id, *args, stack_depth=2)
+def warning(message, job_id: str = None, *args) -> None:
+    log(logging.WARNING, message, job_id, *args, stack_depth=2)
+def error(message, job_id: str = None, *args) -> None:
+    log(logging.ERROR, message, job_id, *args, stack_depth=2)
+def critical(message, job_id: str = None, *args) -> None:
+    log(logging.CRITICAL, message, job_id, *args, stack_depth=2)
+def exception(message, job_id: str = None, *args) -> None:
+    log(logging.ERROR, message, job_id, *args, exc_info=True, stack_depth=2)
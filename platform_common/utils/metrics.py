@@ -0,0 +1,79 @@
+import threading
+from typing import Callable, Dict
+from . import logger
+class MetricsRegistry:
+    """
+    In-process registry of the library's metrics.
+    Counters and timers are recorded by the library as events happen. Collectors are callables that are
+    invoked on every snapshot, for metrics that are owned by another object, e.g. a Kafka producer.
+    Usage:
+        registry.increment("kafka.producer.errors.job-status")
+        registry.record_time("kafka.producer.send_latency_ms.job-status", 12.5)
+        registry.register_collector("kafka.consumer.status-service", consumer_metrics)
+        registry.snapshot()
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.timers: Dict[str, list] = {}
+        self.collectors: Dict[str, Callable[[], dict]] = {}
+    def increment(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    def record_time(self, name: str, elapsed_ms: float) -> None:
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, elapsed_ms, elapsed_ms]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed_ms
+                timer[2] = max(timer[2], elapsed_ms)
+    def register_collector(self, name: str, collector: Callable[[], dict]) -> None:
+        """
+        Registers a callable whose result is included in every snapshot under the given name.
+        A collector may return None to be left out of the snapshot.
+        """
+        with self.lock:
+            self.collectors[name] = collector
+    def unregister_collector(self, name: str) -> None:
+        with self.lock:
+            self.collectors.pop(name, None)
+    def unregister_collectors(self, prefix: str) -> None:
+        """Unregisters every collector whose name starts with the prefix."""
+        with self.lock:
+            for name in [name for name in self.collectors if name.startswith(prefix)]:
+                del self.collectors[name]
+    def snapshot(self) -> dict:
+        """
+        Returns the current value of every metric.
+        Returns:
+            dict: counters, timers with their count, average and maximum in ms, and the result of every collector.
+        """
+        with self.lock:
+            counters = dict(self.counters)
+            timers = {
+                name: {
+                    "count": count,
+                    "avgMs": total_ms / count,
+                    "maxMs": max_ms,
+                }
+                for name, (count, total_ms, max_ms) in self.timers.items()
+            }
+            collectors = dict(self.collectors)
+        collected = {}
+        for name, collector in collectors.items():
+            try:
+                value = collector()
+            except Exception as e:
+                logger.warning(f"Failed to collect the metrics of {name}: {e}")
+                continue
+            if value is not None:
+                collected[name] = value
+        return {"counters": counters, "timers": timers, "collectors": collected}
+    def reset(self) -> None:
+        """Clears the counters and timers, the collectors stay registered."""
+        with self.lock:
+            self.counters = {}
+            self.timers = {}
+registry = MetricsRegistry()
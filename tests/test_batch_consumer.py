@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from kafka import TopicPartition
+from platform_common.stream.batch_consumer import BatchConsumer
+class FakeConsumer:
+    def __init__(self, assignment):
+        self.assigned = set(assignment)
+        self.commits = []
+    def assignment(self):
+        return set(self.assigned)
+    def pause(self, *topic_partitions):
+        pass
+    def commit(self, offsets):
+        self.commits.append(offsets)
+def make_record(topic_partition, offset):
+    return SimpleNamespace(
+        topic=topic_partition.topic,
+        partition=topic_partition.partition,
+        offset=offset,
+        key=None,
+        value=b"{}",
+        headers=[],
+    )
+def test_stale_completion_does_not_complete_a_newer_batch():
+    topic_partition = TopicPartition("job-status", 0)
+    release = threading.Event()
+    def handler(record):
+        if record.offset == 1:
+            release.wait(timeout=5)
+    batch_consumer = BatchConsumer(["job-status"], {"group_id": "test"}, handler)
+    batch_consumer.consumer = FakeConsumer([topic_partition])
+    batch_consumer.executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        batch_consumer.dispatch(topic_partition, [make_record(topic_partition, 0)])
+        # A revoke finishes the batch, its completion stays queued
+        batch_consumer.finish_in_flight([topic_partition])
+        batch_consumer.dispatch(topic_partition, [make_record(topic_partition, 1)])
+        batch_consumer.commit_completed()
+        assert topic_partition in batch_consumer.in_flight
+        assert not batch_consumer.in_flight[topic_partition].done()
+        release.set()
+        batch_consumer.finish_in_flight([topic_partition])
+        assert topic_partition not in batch_consumer.in_flight
+        committed_offsets = [
+            offsets[topic_partition].offset
+            for offsets in batch_consumer.consumer.commits
+        ]
+        assert committed_offsets == [1, 2]
+    finally:
+        release.set()
+        batch_consumer.executor.shutdown(wait=True)
@@ -0,0 +1,62 @@
+import pickle
+import pytest
+from platform_common import dataclasses as models
+from platform_common.dataclasses import (
+    ConnectionConfig,
+    DeltaLakeTable,
+    IbmDb2Table,
+    compact_model,
+)
+TABLE_DETAILS = {
+    "connectorId": "connector",
+    "tableName": "tdsls400",
+    "databaseName": "lake",
+    "sourceType": "DELTA_LAKE",
+    "connectionDetails": {
+        "accessKeyId": "key",
+        "secretAccessKey": "secret",
+        "region": "us-east-1",
+    },
+    "mergeKeys": {"id": "id"},
+    "partitionKeys": ["year", "month"],
+}
+def test_frozen_variants_are_hashable():
+    FrozenDeltaLakeTable = compact_model(DeltaLakeTable, frozen=True)
+    table = FrozenDeltaLakeTable.from_dict(TABLE_DETAILS)
+    same_table = FrozenDeltaLakeTable.from_dict(TABLE_DETAILS)
+    assert hash(table) == hash(same_table)
+    assert len({table, same_table}) == 1
+    FrozenIbmDb2Table = compact_model(IbmDb2Table, frozen=True)
+    db2_table = FrozenIbmDb2Table(
+        connector_id="connector",
+        table_name="orders",
+        database_name="sales",
+        source_type="IBM_DB2",
+        columns=["id"],
+        partition_column_dict={"column": "id", "bounds": [0, 10]},
+    )
+    assert hash(db2_table) == hash(db2_table)
+def test_mutable_variants_are_not_hashable():
+    table = compact_model(DeltaLakeTable).from_dict(TABLE_DETAILS)
+    with pytest.raises(TypeError):
+        hash(table)
+def test_frozen_variants_cannot_be_reassigned():
+    table = compact_model(DeltaLakeTable, frozen=True).from_dict(TABLE_DETAILS)
+    with pytest.raises(AttributeError):
+        table.table_name = "tdsls401"
+@pytest.mark.parametrize("frozen", [False, True])
+def test_nested_dataclasses_are_compacted(frozen):
+    table = compact_model(DeltaLakeTable, frozen).from_dict(TABLE_DETAILS)
+    assert type(table.connection_details) is compact_model(ConnectionConfig, frozen)
+    assert not hasattr(table, "__dict__")
+    assert not hasattr(table.connection_details, "__dict__")
+    assert table.to_dict() == DeltaLakeTable.from_dict(TABLE_DETAILS).to_dict()
+@pytest.mark.parametrize("frozen", [False, True])
+def test_instances_can_be_pickled(frozen):
+    CompactDeltaLakeTable = compact_model(DeltaLakeTable, frozen)
+    table = CompactDeltaLakeTable.from_dict(TABLE_DETAILS)
+    table_copy = pickle.loads(pickle.dumps(table))
+    assert type(table_copy) is CompactDeltaLakeTable
+    assert table_copy == table
+    assert table_copy.requires_incremental_read == table.requires_incremental_read
+    assert getattr(models, CompactDeltaLakeTable.__name__) is CompactDeltaLakeTable
@@ -0,0 +1,68 @@
+import pytest
+from platform_common.stream.kafka import KafkaConnector
+from platform_common.utils import email
+from platform_common.utils.email import EmailNotificationBuffer, build_digest
+@pytest.fixture
+def sent_messages(monkeypatch):
+    sent_messages = []
+    monkeypatch.setattr(email, "get_config", lambda key_name: "email-notification")
+    monkeypatch.setattr(
+        KafkaConnector, "get_producer", staticmethod(lambda topic: None)
+    )
+    monkeypatch.setattr(
+        KafkaConnector,
+        "send_message",
+        staticmethod(lambda topic, message, **kwargs: sent_messages.append(message)),
+    )
+    return sent_messages
+def test_template_digest_keeps_the_data_of_every_message():
+    messages = [
+        {
+            "to": "user@example.com",
+            "template": "question-status",
+            "data": {"question": question},
+        }
+        for question in ("Q1", "Q2", "Q3")
+    ]
+    digest = build_digest(messages)
+    assert digest["template"] == "question-status"
+    assert digest["data"] == {
+        "items": [{"question": "Q1"}, {"question": "Q2"}, {"question": "Q3"}]
+    }
+    assert "html" not in digest
+    assert "subject" not in digest
+def test_html_digest_concatenates_the_bodies():
+    messages = [
+        {"to": "user@example.com", "subject": "Status changed", "html": body}
+        for body in ("first", "second")
+    ]
+    digest = build_digest(messages)
+    assert digest["subject"] == "Status changed (2 updates)"
+    assert digest["html"] == f"first{email.DIGEST_SEPARATOR}second"
+def test_one_digest_is_sent_per_recipient_and_template(sent_messages):
+    buffer = EmailNotificationBuffer(window_sec=60)
+    try:
+        buffer.group(
+            {"to": "a@example.com", "template": "question-status", "data": {"id": 1}}
+        )
+        buffer.group(
+            {"to": "a@example.com", "template": "mapping-approved", "data": {"id": 2}}
+        )
+        buffer.group(
+            {"to": "a@example.com", "template": "question-status", "data": {"id": 3}}
+        )
+        buffer.group(
+            {"to": "b@example.com", "subject": "Status changed", "html": "body"}
+        )
+        buffer.flush()
+    finally:
+        buffer.close()
+    assert sent_messages == [
+        {
+            "to": "a@example.com",
+            "template": "question-status",
+            "data": {"items": [{"id": 1}, {"id": 3}]},
+        },
+        {"to": "a@example.com", "template": "mapping-approved", "data": {"id": 2}},
+        {"to": "b@example.com", "subject": "Status changed", "html": "body"},
+    ]
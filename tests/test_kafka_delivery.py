@@ -0,0 +1,38 @@
+from kafka.errors import KafkaTimeoutError
+from platform_common.stream.kafka import KafkaConnector
+class FakeFuture:
+    def __init__(self):
+        self.errbacks = []
+    def add_callback(self, callback):
+        pass
+    def add_errback(self, errback):
+        self.errbacks.append(errback)
+    def fail(self, error):
+        for errback in self.errbacks:
+            errback(error)
+class FakeProducer:
+    def __init__(self):
+        self.futures = []
+    def send(self, topic, value=None, key=None, headers=None):
+        future = FakeFuture()
+        self.futures.append(future)
+        return future
+def test_failed_delivery_with_non_utf8_key_is_tracked(monkeypatch):
+    producer = FakeProducer()
+    monkeypatch.setattr(KafkaConnector, "get_producer", staticmethod(lambda topic: producer))
+    KafkaConnector.get_failed_deliveries()
+    deliveries = []
+    KafkaConnector.send_message(
+        "job-status",
+        {"status": "FAILED"},
+        key=b"\xff\xfejob",
+        block=False,
+        on_delivery=lambda error, record_metadata: deliveries.append(error),
+    )
+    error = KafkaTimeoutError("timed out")
+    producer.futures[0].fail(error)
+    assert deliveries == [error]
+    failed_deliveries = KafkaConnector.get_failed_deliveries()
+    assert len(failed_deliveries) == 1
+    assert failed_deliveries[0]["key"] == "\ufffd\ufffdjob"
+    assert failed_deliveries[0]["message"] == {"status": "FAILED"}
@@ -0,0 +1,86 @@
+import json
+import logging
+import pytest
+from platform_common.exceptions.exception_handler import DataMeshExceptionHandler
+from platform_common.utils import logger
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    def emit(self, record):
+        self.records.append(record)
+@pytest.fixture
+def rate_limited_records(monkeypatch):
+    handler = RecordingHandler()
+    handler.addFilter(logger.RateLimitFilter(1))
+    monkeypatch.setattr(logger, "track_call_sites", True)
+    logging.root.addHandler(handler)
+    try:
+        yield handler.records
+    finally:
+        logging.root.removeHandler(handler)
+def fetch_connection():
+    try:
+        raise ConnectionError("mongo down")
+    except ConnectionError as e:
+        return DataMeshExceptionHandler.parse_message(e)
+def read_field():
+    try:
+        return {}["field"]
+    except KeyError as e:
+        return DataMeshExceptionHandler.parse_message(e)
+def test_rate_limit_keys_errors_by_the_caller_of_parse_message(rate_limited_records):
+    fetch_connection()
+    read_field()
+    fetch_connection()
+    messages = [record.getMessage() for record in rate_limited_records]
+    assert messages == ["Error occurred:mongo down", "Error occurred:'field'"]
+@pytest.fixture
+def clean_root_logger(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    for attribute in (
+        "queue_handler",
+        "queue_listener",
+        "root_handlers",
+        "structured_logging",
+        "track_call_sites",
+    ):
+        monkeypatch.setattr(logger, attribute, getattr(logger, attribute))
+    monkeypatch.setattr(logger, "root_handlers", [])
+    original_handlers = logging.root.handlers[:]
+    original_level = logging.root.level
+    for handler in original_handlers:
+        logging.root.removeHandler(handler)
+    try:
+        yield tmp_path / "logs" / "app.log"
+    finally:
+        logger.stop_queue_listener()
+        for handler in logging.root.handlers[:]:
+            logging.root.removeHandler(handler)
+            handler.close()
+        for handler in original_handlers:
+            logging.root.addHandler(handler)
+        logging.root.setLevel(original_level)
+def remove_root_handlers():
+    # pytest attaches its log capture handlers to the root logger during the test
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+def test_queue_mode_replaces_the_handlers_of_a_previous_setup(clean_root_logger):
+    remove_root_handlers()
+    logger.setup_logger()
+    logger.setup_logger(queue_mode=True, structured=True)
+    assert logging.root.handlers == [logger.queue_handler]
+    logger.info("hello", "JOB42")
+    logger.stop_queue_listener()
+    entry = json.loads(clean_root_logger.read_text().splitlines()[-1])
+    assert entry["message"] == "hello"
+    assert entry["jobId"] == "JOB42"
+def test_second_setup_without_queue_mode_keeps_the_handlers(clean_root_logger):
+    remove_root_handlers()
+    logger.setup_logger()
+    handlers = logging.root.handlers[:]
+    logger.setup_logger(structured=True)
+    assert logging.root.handlers == handlers
+    assert not logger.structured_logging
+    logger.info("hello", "JOB42")
+    assert "[JOB42] - hello" in clean_root_logger.read_text()